@@ -5,18 +5,60 @@
 2. 内容摘要生成
 
 API 兼容 OpenAI 格式。
+
+长文本按句子边界切分成片段，多个片段并行纠错、分别摘要，再合并成整体摘要（map-reduce）。
+标题生成、原文摘要可以与纠错同时进行，减少串行等待的大模型往返。
+纠错支持流式输出（correct_stream），边生成边返回。
 """
 
+import hashlib
+import json
 import logging
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Iterator, List, Optional
 
-import requests
+from cache import TTLCache
+from http_client import get_session
 
 logger = logging.getLogger(__name__)
 
 _ARK_BASE = "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
 
+# 句子结束位置（标点之后），用于切分长文本
+_SENTENCE_END_RE = re.compile(r"(?<=[。！？!?；;\n])")
+
+
+def split_text(text: str, max_chars: int, utterances: Optional[list] = None) -> List[str]:
+    """把长文本切分成不超过 max_chars 字的片段，片段按顺序拼接后与原文一致
+
+    有转写分句（utterances）时按分句边界切分，否则按句末标点切分；
+    单句超过 max_chars 时强制截断。
+    """
+    if utterances:
+        pieces = [u.get("text", "") for u in utterances if u.get("text")]
+    else:
+        pieces = [p for p in _SENTENCE_END_RE.split(text) if p]
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        while len(piece) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(piece[:max_chars])
+            piece = piece[max_chars:]
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
 
 @dataclass
 class AIProcessResult:
@@ -24,39 +66,155 @@ class AIProcessResult:
     success: bool
     corrected_text: str = ""
     summary: str = ""
+    title: str = ""
     error: Optional[str] = None
 
 
 class AIProcessor:
     """豆包大模型文字处理器"""
 
-    def __init__(self, api_key: str, model: str = "doubao-seed-2-0-mini-260215"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "doubao-seed-2-0-mini-260215",
+        cache: Optional[TTLCache] = None,
+        chunk_chars: int = 3000,
+        concurrency: int = 4,
+        summary_from_raw: bool = False,
+    ):
+        """
+        Args:
+            api_key: 火山方舟 API Key
+            model: 模型名称
+            cache: 模型输出缓存，键为 hash(模型, 提示词, 输入文字)，为空则不缓存
+            chunk_chars: 超过该字数的文本切分成多个片段并行处理
+            concurrency: 并行处理片段时同时进行的大模型请求数
+            summary_from_raw: process 时直接对原文做摘要，与纠错同时进行，
+                而不是等纠错完成后再对纠错结果做摘要
+        """
         self.api_key = api_key
         self.model = model
+        self.cache = cache
+        self.chunk_chars = chunk_chars
+        self.concurrency = max(1, concurrency)
+        self.summary_from_raw = summary_from_raw
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task_executor: Optional[ThreadPoolExecutor] = None
+        self.saved_tokens = 0
+        self._stats_lock = threading.Lock()
+
+    def _cache_key(self, system_prompt: str, user_content: str, max_tokens: int) -> str:
+        raw = json.dumps([self.model, system_prompt, max_tokens, user_content], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    def _payload(self, system_prompt: str, user_content: str, max_tokens: int) -> dict:
+        return {
+            "model": self.model,
+            "reasoning_effort": "none",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content},
+            ],
+            "max_tokens": max_tokens,
+        }
 
     def _call(self, system_prompt: str, user_content: str, max_tokens: int = 4096) -> str:
-        """调用大模型"""
-        resp = requests.post(
+        """调用大模型
+
+        配置了 cache 时，相同的模型 + 提示词 + 输入直接返回缓存的输出，不再请求大模型。
+        """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(system_prompt, user_content, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                with self._stats_lock:
+                    self.saved_tokens += cached.get("tokens", 0)
+                logger.info(f"AI 缓存命中，节省 {cached.get('tokens', 0)} tokens")
+                return cached["content"]
+
+        resp = get_session().post(
             _ARK_BASE,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}",
-            },
-            json={
-                "model": self.model,
-                "reasoning_effort": "none",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content},
-                ],
-                "max_tokens": max_tokens,
-            },
+            headers=self._headers(),
+            json=self._payload(system_prompt, user_content, max_tokens),
             timeout=60,
         )
         data = resp.json()
         if "choices" not in data:
             raise RuntimeError(f"API 返回异常: {data.get('error', data)}")
-        return data["choices"][0]["message"]["content"].strip()
+        content = data["choices"][0]["message"]["content"].strip()
+
+        if key is not None:
+            tokens = data.get("usage", {}).get("total_tokens", 0)
+            self.cache.set(key, {"content": content, "tokens": tokens})
+        return content
+
+    def _call_stream(self, system_prompt: str, user_content: str, max_tokens: int = 4096) -> Iterator[str]:
+        """流式调用大模型，逐段产出生成的文字
+
+        缓存命中时一次性产出缓存内容；收到 [DONE] 或 finish_reason 后才写入缓存（与 _call 共用缓存键），
+        上游中途断开导致的不完整结果不会被缓存。
+        """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(system_prompt, user_content, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                with self._stats_lock:
+                    self.saved_tokens += cached.get("tokens", 0)
+                logger.info(f"AI 缓存命中，节省 {cached.get('tokens', 0)} tokens")
+                yield cached["content"]
+                return
+
+        payload = self._payload(system_prompt, user_content, max_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        parts = []
+        tokens = 0
+        finished = False
+        with get_session().post(
+            _ARK_BASE, headers=self._headers(), json=payload, stream=True, timeout=60
+        ) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f"API 返回异常: HTTP {resp.status_code} {resp.text[:200]}")
+            # SSE 格式：每行 "data: {...}"，以 "data: [DONE]" 结束
+            for line in resp.iter_lines(decode_unicode=False):
+                if not line.startswith(b"data:"):
+                    continue
+                body = line[5:].strip()
+                if body == b"[DONE]":
+                    finished = True
+                    break
+                data = json.loads(body)
+                if "error" in data:
+                    raise RuntimeError(f"API 返回异常: {data['error']}")
+                if data.get("usage"):
+                    tokens = data["usage"].get("total_tokens", 0)
+                for choice in data.get("choices", []):
+                    delta = choice.get("delta", {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                    if choice.get("finish_reason"):
+                        finished = True
+
+        if not finished:
+            logger.warning("AI 流式响应未正常结束，结果不写入缓存")
+        elif key is not None:
+            self.cache.set(key, {"content": "".join(parts).strip(), "tokens": tokens})
+
+    def stats(self) -> dict:
+        """缓存命中率与节省的 token 数"""
+        stats = self.cache.stats() if self.cache is not None else {}
+        with self._stats_lock:
+            stats["saved_tokens"] = self.saved_tokens
+        return stats
 
     def generate_title(self, text: str) -> str:
         """根据文字内容自动生成一个简短标题
@@ -86,42 +244,161 @@ class AIProcessor:
             logger.error(f"AI 生成标题失败: {e}")
             return ""
 
-    def process(self, raw_text: str) -> AIProcessResult:
-        """对转写文字做纠错 + 摘要
+    def _map(self, fn: Callable, items: list) -> list:
+        """在线程池中并行处理各片段，结果保持输入顺序；任一片段失败则抛出异常"""
+        return list(self._get_executor().map(fn, items))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """片段线程池（懒加载）"""
+        with self._stats_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="ai"
+                )
+            return self._executor
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """在后台执行与纠错并行的整段任务（标题、摘要）
+
+        与片段线程池分开，避免整段任务占满片段线程池、等待自己的片段时死锁。
+        """
+        with self._stats_lock:
+            if self._task_executor is None:
+                self._task_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai-task")
+        return self._task_executor.submit(fn, *args)
+
+    def _split(self, text: str, utterances: Optional[list] = None) -> List[str]:
+        if len(text) <= self.chunk_chars:
+            return [text]
+        return split_text(text, self.chunk_chars, utterances)
+
+    _CORRECT_PROMPT = (
+        "你是一个专业的中文文字校对助手。"
+        "请对以下语音转写文字进行纠错处理：修正错别字、同音字错误、语法不通顺的地方。"
+        "保持原文的意思和风格不变，只做必要的纠正。"
+        "直接输出纠正后的文字，不要添加任何说明或标注。"
+    )
+
+    def _correct_chunk(self, raw_text: str) -> str:
+        return self._call(system_prompt=self._CORRECT_PROMPT, user_content=raw_text)
+
+    def _summarize_chunk(self, text: str) -> str:
+        return self._call(
+            system_prompt=(
+                "你是一个专业的内容摘要助手。"
+                "请对以下文字生成一段简洁的摘要，概括核心要点。"
+                "摘要控制在 200 字以内，用清晰的条理呈现。"
+                '直接输出摘要内容，不要添加"摘要："等前缀。'
+            ),
+            user_content=text,
+            max_tokens=10000,
+        )
+
+    def _reduce_summaries(self, summaries: List[str]) -> str:
+        """把各片段的摘要合并成整体摘要"""
+        if len(summaries) == 1:
+            return summaries[0]
+        return self._call(
+            system_prompt=(
+                "你是一个专业的内容摘要助手。"
+                "以下是一篇长文按顺序分段后各部分的摘要，请将它们整合为一段完整、连贯的整体摘要，概括核心要点。"
+                "摘要控制在 200 字以内，用清晰的条理呈现。"
+                '直接输出摘要内容，不要添加"摘要："等前缀。'
+            ),
+            user_content="\n\n".join(f"第{i + 1}部分：{s}" for i, s in enumerate(summaries)),
+            max_tokens=10000,
+        )
+
+    def correct(self, raw_text: str, utterances: Optional[list] = None) -> str:
+        """纠正语音转写文字中的错别字、同音字和语病，失败抛出异常
+
+        长文本按分句/句子边界切分后并行纠错，再按原顺序拼接。
+        """
+        chunks = self._split(raw_text, utterances)
+        if len(chunks) == 1:
+            return self._correct_chunk(raw_text)
+        logger.info(f"AI 分段纠错: {len(raw_text)} 字, {len(chunks)} 段")
+        return "".join(self._map(self._correct_chunk, chunks))
+
+    def correct_stream(self, raw_text: str, utterances: Optional[list] = None) -> Iterator[str]:
+        """流式纠错，逐段产出纠正后的文字，拼接后与 correct() 的结果一致（首尾空白除外）
+
+        长文本分段时，第一段流式输出，其余片段同时在线程池中纠错，按顺序接在后面输出。
+        失败抛出异常（可能已产出部分文字）。
+        """
+        chunks = self._split(raw_text, utterances)
+        rest = []
+        if len(chunks) > 1:
+            logger.info(f"AI 分段流式纠错: {len(raw_text)} 字, {len(chunks)} 段")
+            executor = self._get_executor()
+            rest = [executor.submit(self._correct_chunk, chunk) for chunk in chunks[1:]]
+        try:
+            yield from self._call_stream(self._CORRECT_PROMPT, chunks[0])
+            for future in rest:
+                yield future.result()
+        finally:
+            for future in rest:
+                future.cancel()
+
+    def summarize(self, text: str) -> str:
+        """生成 200 字以内的内容摘要，失败抛出异常
+
+        长文本先并行生成各段摘要，再合并为整体摘要。
+        """
+        chunks = self._split(text)
+        if len(chunks) == 1:
+            return self._summarize_chunk(text)
+        logger.info(f"AI 分段摘要: {len(text)} 字, {len(chunks)} 段")
+        return self._reduce_summaries(self._map(self._summarize_chunk, chunks))
+
+    def process(
+        self, raw_text: str, utterances: Optional[list] = None, with_title: bool = False
+    ) -> AIProcessResult:
+        """对转写文字做纠错 + 摘要（可选同时生成标题）
+
+        长文本切分成片段后并行处理：每个片段先纠错、再对纠错结果做摘要，
+        最后按顺序拼接纠错文本，并把各段摘要合并成整体摘要。
+        summary_from_raw 为 True 时摘要直接基于原文，与纠错同时进行；
+        with_title 为 True 时标题基于原文开头，同样与纠错同时进行。
 
         Args:
             raw_text: 语音转写的原始文字
+            utterances: 转写分句（可选），用于按分句边界切分长文本
+            with_title: 是否同时生成标题
 
         Returns:
-            AIProcessResult 包含纠正后的文字和摘要
+            AIProcessResult 包含纠正后的文字、摘要和标题（with_title 时）
         """
+        title_future = self._submit(self.generate_title, raw_text) if with_title else None
         try:
-            # 1. 纠错
-            corrected = self._call(
-                system_prompt=(
-                    "你是一个专业的中文文字校对助手。"
-                    "请对以下语音转写文字进行纠错处理：修正错别字、同音字错误、语法不通顺的地方。"
-                    "保持原文的意思和风格不变，只做必要的纠正。"
-                    "直接输出纠正后的文字，不要添加任何说明或标注。"
-                ),
-                user_content=raw_text,
-            )
+            chunks = self._split(raw_text, utterances)
+            if self.summary_from_raw:
+                summary_future = self._submit(self.summarize, raw_text)
+                corrected = self.correct(raw_text, utterances)
+                summary = summary_future.result()
+            elif len(chunks) == 1:
+                # 1. 纠错
+                corrected = self._correct_chunk(raw_text)
 
-            # 2. 摘要
-            summary = self._call(
-                system_prompt=(
-                    "你是一个专业的内容摘要助手。"
-                    "请对以下文字生成一段简洁的摘要，概括核心要点。"
-                    "摘要控制在 200 字以内，用清晰的条理呈现。"
-                    '直接输出摘要内容，不要添加"摘要："等前缀。'
-                ),
-                user_content=corrected,
-                max_tokens=10000,
-            )
+                # 2. 摘要
+                summary = self._summarize_chunk(corrected)
+            else:
+                logger.info(f"AI 分段处理: {len(raw_text)} 字, {len(chunks)} 段")
+
+                def handle(chunk: str):
+                    fixed = self._correct_chunk(chunk)
+                    return fixed, self._summarize_chunk(fixed)
+
+                results = self._map(handle, chunks)
+                corrected = "".join(fixed for fixed, _ in results)
+                summary = self._reduce_summaries([part for _, part in results])
 
+            title = title_future.result() if title_future else ""
             logger.info(f"AI 处理完成: 原文 {len(raw_text)} 字 -> 纠正 {len(corrected)} 字, 摘要 {len(summary)} 字")
-            return AIProcessResult(success=True, corrected_text=corrected, summary=summary)
+            return AIProcessResult(success=True, corrected_text=corrected, summary=summary, title=title)
 
         except Exception as e:
             logger.error(f"AI 处理失败: {e}")
-            return AIProcessResult(success=False, error=str(e))
+            # generate_title 自身不抛异常，纠错失败时标题仍可使用
+            title = title_future.result() if title_future else ""
+            return AIProcessResult(success=False, title=title, error=str(e))
@@ -0,0 +1,290 @@
+"""抖音视频异步解析器
+
+基于 aiohttp 的原生 asyncio 版本解析器，解析逻辑与 VideoResolver 相同，返回同样的 VideoRecord。
+所有请求共用一个带连接池的 ClientSession，不占用线程池，
+单进程即可同时处理上千个解析请求，适合批量导入等场景。
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, List, Optional
+from urllib.parse import urljoin
+
+import aiohttp
+
+from cache import TTLCache
+from models import VideoRecord
+from rate_limiter import HostRateLimiter
+from singleflight import AsyncSingleFlight
+from video_resolver import (
+    _HEADERS,
+    _SHARE_URL_TEMPLATE,
+    _STREAM_CHUNK_SIZE,
+    RouterDataScanner,
+    _apply_video_info,
+    extract_aweme_id,
+    extract_input_url,
+    extract_short_code,
+    parse_router_data,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncVideoResolver:
+    """抖音视频异步解析器
+
+    用法：
+        async with AsyncVideoResolver(concurrency=200) as resolver:
+            async for video in resolver.resolve_stream(videos):
+                ...
+
+    缓存读写是同步的（内存 LRU / SQLite 单行查询），耗时远小于一次网络请求，直接在事件循环中执行。
+    """
+
+    def __init__(
+        self,
+        delay: float = 2.0,
+        timeout: float = 15.0,
+        cache: Optional[TTLCache] = None,
+        short_link_cache: Optional[TTLCache] = None,
+        negative_ttl: float = 300.0,
+        first_hop_only: bool = False,
+        concurrency: int = 100,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        pool_size: int = 100,
+    ):
+        """
+        Args:
+            delay: 批量解析时同一 host 两次请求的最小间隔秒数，防止触发反爬
+            timeout: 单次请求超时时间
+            cache: 解析结果缓存（aweme_id → 播放地址/时长/标题/作者），为空则不缓存
+            short_link_cache: 短链接缓存（短码 → aweme_id），为空则不缓存
+            negative_ttl: 无效短链接的缓存时间（秒）
+            first_hop_only: 短链接只读取第一跳 Location，拿不到 aweme_id 时再跟踪完整重定向链
+            concurrency: 批量解析时同时进行的解析数
+            pool_size: 连接池最大连接数
+            rate: 批量解析时每个 host 每秒最多请求数，为空则按 delay 换算（1 / delay）
+            burst: 每个 host 允许的突发请求数
+        """
+        self.delay = delay
+        self.timeout = timeout
+        self.cache = cache
+        self.short_link_cache = short_link_cache
+        self.negative_ttl = negative_ttl
+        self.first_hop_only = first_hop_only
+        self.concurrency = max(1, concurrency)
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 合并并发的相同请求：同一视频/短链接同时只有一个上游请求
+        self.inflight = AsyncSingleFlight()
+        if rate is None:
+            rate = 1.0 / delay if delay > 0 else 0.0
+        self._batch_limiter = HostRateLimiter(rate=rate, burst=max(1, burst))
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 ClientSession（懒加载，绕过系统代理）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=False,
+            )
+        return self._session
+
+    async def resolve(
+        self, video: VideoRecord, rate_limiter: Optional[HostRateLimiter] = None
+    ) -> VideoRecord:
+        """解析单个视频，行为与 VideoResolver.resolve 一致
+
+        解析失败不抛异常，只记录日志，返回原始 VideoRecord（play_url 为空）。
+        """
+        url = extract_input_url(video.url)
+        if not url:
+            return video
+
+        aweme_id = extract_aweme_id(url)
+        if not aweme_id and "v.douyin.com" in url:
+            aweme_id = await self._resolve_short_link(url, rate_limiter)
+
+        if not aweme_id:
+            logger.warning(f"无法从 URL 提取 aweme_id: {url}")
+            return video
+
+        video.aweme_id = aweme_id
+
+        info = await self._get_video_info(aweme_id, video, rate_limiter)
+        if info:
+            _apply_video_info(video, info)
+        return video
+
+    async def _head(self, url: str, follow_redirects: bool) -> Optional[str]:
+        """HEAD 请求短链接，返回重定向后的 URL，网络失败返回 None"""
+        try:
+            async with self._get_session().head(url, allow_redirects=follow_redirects) as resp:
+                if follow_redirects:
+                    final_url = str(resp.url)
+                else:
+                    location = resp.headers.get("Location", "")
+                    final_url = urljoin(url, location) if location else str(resp.url)
+            logger.info(f"短链接重定向: {url} -> {final_url}")
+            return final_url
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"短链接解析失败: {url} - {e}")
+            return None
+
+    async def _resolve_short_link(
+        self, url: str, rate_limiter: Optional[HostRateLimiter] = None
+    ) -> Optional[str]:
+        """短链接 → aweme_id，带缓存（含失败结果的短期缓存）"""
+        code = extract_short_code(url)
+        if code and self.short_link_cache is not None:
+            cached = self.short_link_cache.get(code)
+            if cached is not None:
+                logger.info(f"短链接缓存命中: {code} -> {cached or '无效链接'}")
+                return cached or None
+
+        return await self.inflight.do(
+            f"short:{code or url}", self._load_short_link, url, code, rate_limiter
+        )
+
+    async def _load_short_link(
+        self, url: str, code: Optional[str], rate_limiter: Optional[HostRateLimiter]
+    ) -> Optional[str]:
+        """请求短链接重定向并写入短链接缓存"""
+        logger.info(f"检测到短链接，尝试重定向解析: {url}")
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async(url)
+        final_url = None
+        if self.first_hop_only:
+            final_url = await self._head(url, follow_redirects=False)
+            if final_url and not extract_aweme_id(final_url):
+                final_url = None
+        if not final_url:
+            final_url = await self._head(url, follow_redirects=True)
+        if final_url is None:
+            return None
+
+        aweme_id = extract_aweme_id(final_url)
+        if code and self.short_link_cache is not None:
+            if aweme_id:
+                self.short_link_cache.set(code, aweme_id)
+            else:
+                self.short_link_cache.set(code, "", ttl=self.negative_ttl)
+        return aweme_id
+
+    async def _get_video_info(
+        self,
+        aweme_id: str,
+        video: VideoRecord,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> Optional[dict]:
+        """获取视频信息，优先读缓存，未命中时请求分享页并写回缓存"""
+        if self.cache is not None:
+            cached = self.cache.get(aweme_id)
+            if cached is not None:
+                logger.info(f"解析缓存命中: {aweme_id}")
+                return cached
+
+        return await self.inflight.do(
+            f"video:{aweme_id}", self._load_video_info, aweme_id, video, rate_limiter
+        )
+
+    async def _load_video_info(
+        self, aweme_id: str, video: VideoRecord, rate_limiter: Optional[HostRateLimiter]
+    ) -> Optional[dict]:
+        """请求分享页并写入解析缓存"""
+        info = await self._fetch_video_info(aweme_id, video, rate_limiter)
+
+        # 只缓存拿到播放地址的结果，失败的下次重新请求
+        if info and info.get("play_url") and self.cache is not None:
+            self.cache.set(aweme_id, info)
+        return info
+
+    async def _fetch_video_info(
+        self,
+        aweme_id: str,
+        video: VideoRecord,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> Optional[dict]:
+        """请求 iesdouyin 分享页并提取视频信息，失败返回 None"""
+        try:
+            share_url = _SHARE_URL_TEMPLATE.format(aweme_id=aweme_id)
+            if rate_limiter is not None:
+                await rate_limiter.acquire_async(share_url)
+            async with self._get_session().get(share_url) as resp:
+                if resp.status != 200:
+                    logger.warning(f"请求失败 HTTP {resp.status}: {video.title}")
+                    return None
+                # 流式读取：_ROUTER_DATA 脚本结束后立即停止
+                scanner = RouterDataScanner()
+                async for chunk in resp.content.iter_chunked(_STREAM_CHUNK_SIZE):
+                    if scanner.feed(chunk):
+                        break
+
+            if scanner.result is None:
+                logger.warning(f"未找到 _ROUTER_DATA: {video.title}")
+                return None
+            return parse_router_data(scanner.result, video.title)
+
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON 解析失败: {video.title} - {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"网络请求失败: {video.title} - {e}")
+        except Exception as e:
+            logger.error(f"解析异常: {video.title} - {e}")
+
+        return None
+
+    async def resolve_stream(
+        self, videos: List[VideoRecord], concurrency: Optional[int] = None
+    ) -> AsyncIterator[VideoRecord]:
+        """并发解析视频列表，按完成顺序逐个产出结果
+
+        最多 concurrency 个视频同时解析，请求按 host 令牌桶限速。
+        已有播放地址的视频直接产出，不发请求。
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def worker(video: VideoRecord) -> VideoRecord:
+            if video.video_play_url:
+                return video
+            async with semaphore:
+                return await self.resolve(video, self._batch_limiter)
+
+        tasks = [asyncio.ensure_future(worker(v)) for v in videos]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def resolve_batch(
+        self, videos: List[VideoRecord], concurrency: Optional[int] = None
+    ) -> List[VideoRecord]:
+        """批量解析视频列表，全部完成后按输入顺序返回（原地修改）"""
+        async for _ in self.resolve_stream(videos, concurrency):
+            pass
+
+        total = len(videos)
+        success = sum(1 for v in videos if v.video_play_url)
+        logger.info(f"批量解析完成: {success}/{total} 个视频解析成功")
+        return list(videos)
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncVideoResolver":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
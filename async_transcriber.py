@@ -0,0 +1,297 @@
+"""火山引擎语音转文字（asyncio 版）
+
+与 Transcriber 使用同一个接口，区别在于：
+- 基于 aiohttp，提交和查询都不占用线程
+- 不使用阻塞查询；所有进行中的任务由同一个轮询协程统一查询
+- 轮询间隔随媒体时长自适应：首次查询在预计完成时间附近，之后按倍数退避
+
+单个进程即可同时跟踪数百个进行中的转写任务。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import aiohttp
+
+from cache import TTLCache
+from transcriber import (
+    _BASE_URL,
+    _CODE_PROCESSING,
+    _SUBMIT_PARAMS,
+    TranscriptResult,
+    result_from_query,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingJob:
+    """一个已提交、等待结果的转写任务"""
+    job_id: str
+    future: asyncio.Future
+    deadline: float
+    interval: float
+    next_poll: float = field(default=0.0)
+
+
+class AsyncTranscriber:
+    """火山引擎语音转文字（asyncio 版）
+
+    用法：
+        async with AsyncTranscriber(app_id, token) as transcriber:
+            results = await asyncio.gather(*(transcriber.transcribe(url) for url in urls))
+    """
+
+    def __init__(
+        self,
+        app_id: str,
+        access_token: str,
+        timeout: float = 900.0,
+        cache: Optional[TTLCache] = None,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        expected_speed: float = 0.1,
+        poll_concurrency: int = 20,
+        pool_size: int = 50,
+    ):
+        """
+        Args:
+            app_id: 火山引擎应用 ID
+            access_token: Bearer Token
+            timeout: 单个任务从提交到出结果的最长等待时间（秒）
+            cache: 转写结果缓存（媒体标识 → 文本/分句/时长），为空则不缓存
+            min_interval: 最短轮询间隔（秒）
+            max_interval: 最长轮询间隔（秒）
+            backoff: 每次查询仍在处理中时，轮询间隔乘以该倍数
+            expected_speed: 预计处理耗时与媒体时长之比，用于安排首次查询
+            poll_concurrency: 轮询时同时进行的查询请求数
+            pool_size: 连接池最大连接数
+        """
+        self.app_id = app_id
+        self.access_token = access_token
+        self.timeout = timeout
+        self.cache = cache
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.expected_speed = expected_speed
+        self.poll_concurrency = max(1, poll_concurrency)
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: Dict[str, _PendingJob] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 ClientSession（懒加载）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers={"Authorization": f"Bearer; {self.access_token}"},
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+        return self._session
+
+    def _first_interval(self, duration: float) -> float:
+        """按媒体时长估计首次查询的等待时间"""
+        return min(self.max_interval, max(self.min_interval, duration * self.expected_speed))
+
+    async def _submit(self, audio_url: str) -> Optional[str]:
+        """提交音频 URL，返回任务 ID"""
+        try:
+            async with self._get_session().post(
+                f"{_BASE_URL}/submit",
+                params={"appid": self.app_id, **{k: str(v) for k, v in _SUBMIT_PARAMS.items()}},
+                json={"url": audio_url},
+            ) as resp:
+                if resp.status != 200:
+                    logger.error(f"submit 请求失败 HTTP {resp.status}: {await resp.text()}")
+                    return None
+                data = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"submit 请求失败: {e}")
+            return None
+
+        if str(data.get("code")) != "0":
+            logger.error(f"submit 失败: {data.get('message')}")
+            return None
+        job_id = data.get("id")
+        logger.info(f"任务已提交, job_id={job_id}")
+        return job_id
+
+    async def _query(self, job_id: str) -> dict:
+        """非阻塞查询一次转写结果"""
+        try:
+            async with self._get_session().get(
+                f"{_BASE_URL}/query",
+                params={"appid": self.app_id, "id": job_id, "blocking": "0"},
+            ) as resp:
+                if resp.status != 200:
+                    logger.error(f"query 请求失败 HTTP {resp.status}")
+                    return {"code": -1, "message": f"HTTP {resp.status}"}
+                return await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # 网络错误按"处理中"对待，下次轮询重试
+            logger.warning(f"query 请求失败: {job_id} - {e}")
+            return {"code": _CODE_PROCESSING}
+
+    def get_cached(self, cache_key: Optional[str]) -> Optional[TranscriptResult]:
+        """读取已缓存的转写结果，没有返回 None"""
+        if self.cache is None or not cache_key:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        logger.info(f"转写缓存命中: {cache_key}")
+        return TranscriptResult(
+            text=cached.get("text", ""),
+            duration=cached.get("duration", 0.0),
+            utterances=cached.get("utterances", []),
+        )
+
+    async def transcribe(
+        self, audio_url: str, cache_key: Optional[str] = None, duration: float = 0.0
+    ) -> TranscriptResult:
+        """转写音频 URL 为文字
+
+        Args:
+            audio_url: 音频/视频的可访问 URL
+            cache_key: 缓存键（一般为 media_fingerprint(播放地址)），为空则不读写缓存
+            duration: 媒体时长（秒，可选），用于安排轮询时间
+
+        Returns:
+            TranscriptResult 包含完整文本和分句信息
+        """
+        cached = self.get_cached(cache_key)
+        if cached is not None:
+            return cached
+
+        job_id = await self._submit(audio_url)
+        if not job_id:
+            return TranscriptResult(text="", error="提交转写任务失败")
+
+        now = time.monotonic()
+        interval = self._first_interval(duration)
+        job = _PendingJob(
+            job_id=job_id,
+            future=asyncio.get_running_loop().create_future(),
+            deadline=now + self.timeout,
+            interval=interval,
+            next_poll=now + interval,
+        )
+        self._pending[job_id] = job
+        self._ensure_poller()
+        try:
+            result = await job.future
+        finally:
+            self._pending.pop(job_id, None)
+
+        transcript = result_from_query(result)
+        if not transcript.error and cache_key and self.cache is not None:
+            self.cache.set(cache_key, {
+                "text": transcript.text,
+                "duration": transcript.duration,
+                "utterances": transcript.utterances,
+            })
+        return transcript
+
+    def _ensure_poller(self):
+        """启动轮询协程（每个事件循环只有一个）"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll_loop())
+        self._wakeup.set()
+
+    async def _poll_loop(self):
+        """统一查询所有到期的任务，没有进行中的任务时退出
+
+        轮询协程意外退出时，所有等待中的任务以失败结束，不会一直挂起。
+        """
+        try:
+            await self._poll_until_idle()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"转写轮询异常退出: {e}")
+            for job in list(self._pending.values()):
+                if not job.future.done():
+                    job.future.set_result({"code": -1, "message": f"轮询异常: {e}"})
+        finally:
+            if self._poller is asyncio.current_task():
+                self._poller = None
+
+    async def _poll_until_idle(self):
+        semaphore = asyncio.Semaphore(self.poll_concurrency)
+
+        async def poll(job: _PendingJob):
+            try:
+                async with semaphore:
+                    result = await self._query(job.job_id)
+                if not isinstance(result, dict):
+                    raise ValueError(f"返回格式错误: {type(result).__name__}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 如 200 响应不是 JSON：按"处理中"对待，超时前下次轮询重试
+                logger.warning(f"query 结果异常: {job.job_id} - {e}")
+                result = {"code": _CODE_PROCESSING}
+            if job.future.done():
+                return
+            now = time.monotonic()
+            if result.get("code", -1) != _CODE_PROCESSING:
+                job.future.set_result(result)
+            elif now >= job.deadline:
+                job.future.set_result({"code": _CODE_PROCESSING, "message": "转写超时"})
+            else:
+                job.interval = min(self.max_interval, job.interval * self.backoff)
+                job.next_poll = now + job.interval
+
+        while True:
+            # 等待方被取消的任务不再查询
+            for job_id in [k for k, j in self._pending.items() if j.future.done()]:
+                self._pending.pop(job_id, None)
+            if not self._pending:
+                return
+
+            now = time.monotonic()
+            due = [job for job in self._pending.values() if job.next_poll <= now]
+            if due:
+                await asyncio.gather(*(poll(job) for job in due))
+                continue
+
+            self._wakeup.clear()
+            wait = min(job.next_poll for job in self._pending.values()) - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._pending)}
+
+    async def close(self):
+        """停止轮询并关闭连接池（进行中的等待方会被取消）"""
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        for job in self._pending.values():
+            job.future.cancel()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncTranscriber":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
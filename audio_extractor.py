@@ -0,0 +1,120 @@
+"""音频抽取
+
+转写只需要音轨。用 ffmpeg 从视频中抽出音轨（AAC 直接复制，不重新编码），
+封装为 m4a 缓存到本地，火山引擎回源下载时只传输音频，体积通常只有原视频的几分之一。
+
+依赖系统中的 ffmpeg 可执行文件；找不到 ffmpeg 时 available 为 False，调用方应退回完整视频。
+
+ffmpeg 的输入只接受两种来源，避免读取本地任意文件或访问内网地址：
+- 抖音播放域名 / CDN 上的 http(s) 地址，限定 http、https、tcp、tls 协议
+- 视频缓存（MediaCache）中已下载完成的文件，额外允许 file 协议
+"""
+
+import logging
+import shutil
+import subprocess
+from typing import Dict, List, Optional
+
+from media_cache import MediaCache
+from singleflight import SingleFlight
+from transcriber import is_douyin_media_url
+
+logger = logging.getLogger(__name__)
+
+_REMOTE_PROTOCOLS = "https,http,tcp,tls"
+_LOCAL_PROTOCOLS = "file"
+
+
+class AudioExtractor:
+    """从视频中抽取音轨并缓存为 m4a"""
+
+    def __init__(
+        self,
+        cache: MediaCache,
+        video_cache: Optional[MediaCache] = None,
+        ffmpeg: str = "ffmpeg",
+        timeout: float = 300.0,
+    ):
+        """
+        Args:
+            cache: 音频文件缓存（扩展名 .m4a）
+            video_cache: 视频文件缓存，已缓存的视频直接从本地文件抽取
+            ffmpeg: ffmpeg 可执行文件名或路径
+            timeout: 单次抽取的超时时间（秒）
+        """
+        self.cache = cache
+        self.video_cache = video_cache
+        self.ffmpeg = shutil.which(ffmpeg)
+        self.timeout = timeout
+        self.inflight = SingleFlight()
+        if not self.ffmpeg:
+            logger.warning(f"未找到 ffmpeg ({ffmpeg})，转写将使用完整视频")
+
+    @property
+    def available(self) -> bool:
+        return bool(self.ffmpeg)
+
+    def extract(self, key: str, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """抽取音轨，返回缓存的 m4a 文件路径，失败或 url 不是抖音媒体地址时返回 None
+
+        Args:
+            key: 媒体标识（与视频缓存相同）
+            url: 视频的播放地址；视频缓存中已有 key 对应的文件时从本地文件抽取
+            headers: 从 url 下载时附带的请求头（如 Referer）
+        """
+        if not self.available:
+            return None
+        if not is_douyin_media_url(url):
+            logger.warning(f"拒绝抽取非抖音媒体地址: {url[:200]}")
+            return None
+        path = self.cache.lookup(key)
+        if path:
+            return path
+        # 同一视频并发请求只抽取一次
+        return self.inflight.do(key, self.cache.store, key, lambda tmp: self._extract(key, url, tmp, headers))
+
+    def _extract(self, key: str, url: str, output: str, headers: Optional[Dict[str, str]]) -> bool:
+        local = self.video_cache.lookup(key) if self.video_cache is not None else None
+        if local:
+            return self._run(self._local_input(local), output)
+        return self._run(self._remote_input(url, headers), output)
+
+    @staticmethod
+    def _local_input(path: str) -> List[str]:
+        """视频缓存中的本地文件，只允许 file 协议"""
+        return ["-protocol_whitelist", _LOCAL_PROTOCOLS, "-i", f"file:{path}"]
+
+    @staticmethod
+    def _remote_input(url: str, headers: Optional[Dict[str, str]]) -> List[str]:
+        """抖音媒体地址，只允许网络协议（不能通过跳转或播放列表读取本地文件）"""
+        args = ["-protocol_whitelist", _REMOTE_PROTOCOLS]
+        if headers:
+            args += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+        return args + ["-i", url]
+
+    def _command(self, source: List[str], output: str, codec: List[str]) -> List[str]:
+        return [
+            self.ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            *source, "-vn", "-map", "0:a:0", *codec, "-movflags", "+faststart", "-f", "mp4", output,
+        ]
+
+    def _run(self, source: List[str], output: str) -> bool:
+        """执行 ffmpeg：优先直接复制音轨，失败时转码为 AAC"""
+        for codec in (["-c:a", "copy"], ["-c:a", "aac", "-b:a", "64k"]):
+            try:
+                proc = subprocess.run(
+                    self._command(source, output, codec),
+                    capture_output=True,
+                    timeout=self.timeout,
+                )
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.error(f"音频抽取失败: {e}")
+                return False
+            if proc.returncode == 0:
+                logger.info(f"音频抽取完成: {output} ({' '.join(codec)})")
+                return True
+            logger.warning(f"音频抽取失败 ({' '.join(codec)}): {proc.stderr.decode('utf-8', 'replace')[-300:]}")
+        return False
+
+    def stats(self) -> dict:
+        return dict(self.cache.stats(), ffmpeg=self.available, singleflight=self.inflight.stats())
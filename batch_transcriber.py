@@ -0,0 +1,166 @@
+"""批量转写
+
+把批量解析得到的 VideoRecord 列表提交给 AsyncTranscriber 转写，
+同时进行的转写任务数不超过 max_in_flight，结果整理为 models.TranscriptResult。
+
+每完成一个视频就把结果追加到断点文件（JSON Lines），中断后重新运行时
+已完成的视频直接从断点文件读取，不会重新提交；失败的视频会重新转写。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from async_transcriber import AsyncTranscriber
+from config import Config
+from models import TranscriptResult, VideoRecord
+from transcriber import media_fingerprint, proxy_url
+
+logger = logging.getLogger(__name__)
+
+
+class BatchTranscriber:
+    """批量转写
+
+    用法：
+        async with AsyncTranscriber(app_id, token) as transcriber:
+            batch = BatchTranscriber(transcriber, max_in_flight=20, checkpoint_path="data/batch.jsonl")
+            results = await batch.transcribe_batch(videos)
+    """
+
+    def __init__(
+        self,
+        transcriber: AsyncTranscriber,
+        max_in_flight: int = 20,
+        checkpoint_path: Optional[str] = None,
+        audio_url: Optional[Callable[[VideoRecord], str]] = None,
+    ):
+        """
+        Args:
+            transcriber: 异步转写器
+            max_in_flight: 同时进行的转写任务数上限
+            checkpoint_path: 断点文件路径，为空则不记录进度
+            audio_url: VideoRecord → 提交给转写服务的音频地址；默认为本服务的 /api/download 代理地址
+                （PROXY_BASE_URL），抖音播放地址有防盗链，转写服务无法直接下载
+        """
+        self.transcriber = transcriber
+        self.max_in_flight = max(1, max_in_flight)
+        self.checkpoint_path = checkpoint_path
+        self.audio_url = audio_url or (
+            lambda video: proxy_url(Config.PROXY_BASE_URL, "/api/download", video.video_play_url)
+        )
+
+    @staticmethod
+    def _key(video: VideoRecord) -> str:
+        """断点文件中标识视频的键"""
+        if video.aweme_id:
+            return f"aweme:{video.aweme_id}"
+        if video.video_play_url:
+            return media_fingerprint(video.video_play_url)
+        return f"url:{video.url}"
+
+    def _load_checkpoint(self) -> Dict[str, TranscriptResult]:
+        """读取已完成的结果，忽略写了一半的最后一行"""
+        done = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[record["key"]] = TranscriptResult.from_dict(record["result"])
+        return done
+
+    def _save_checkpoint(self, key: str, result: TranscriptResult):
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps({"key": key, "result": result.to_dict()}, ensure_ascii=False)
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _transcribe_one(self, video: VideoRecord) -> TranscriptResult:
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        if not video.video_play_url:
+            return TranscriptResult(
+                video_url=video.url, video_title=video.title, text="",
+                transcribed_at=now, error="未解析到播放地址",
+            )
+        result = await self.transcriber.transcribe(
+            self.audio_url(video),
+            cache_key=media_fingerprint(video.video_play_url),
+            duration=video.duration_seconds,
+        )
+        return TranscriptResult(
+            video_url=video.url,
+            video_title=video.title,
+            text=result.text,
+            duration_seconds=result.duration or video.duration_seconds,
+            transcribed_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+            error=result.error,
+        )
+
+    async def transcribe_stream(
+        self, videos: List[VideoRecord]
+    ) -> AsyncIterator[Tuple[int, TranscriptResult]]:
+        """批量转写，按完成顺序产出 (输入位置, 结果)
+
+        断点文件中已完成的视频最先产出；同一批次中重复的视频只转写一次。
+        """
+        done = self._load_checkpoint()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        flights: Dict[str, asyncio.Task] = {}
+
+        async def run(key: str, video: VideoRecord) -> TranscriptResult:
+            async with semaphore:
+                result = await self._transcribe_one(video)
+            if not result.error:
+                self._save_checkpoint(key, result)
+            return result
+
+        async def worker(index: int, key: str) -> Tuple[int, TranscriptResult]:
+            return index, await flights[key]
+
+        skipped = 0
+        tasks = []
+        # 产出断点结果时调用方可能停止迭代，try 要覆盖任务创建，已创建的任务在 finally 中取消
+        try:
+            for i, video in enumerate(videos):
+                key = self._key(video)
+                if key in done:
+                    skipped += 1
+                    yield i, done[key]
+                    continue
+                if key not in flights:
+                    flights[key] = asyncio.ensure_future(run(key, video))
+                tasks.append(asyncio.ensure_future(worker(i, key)))
+
+            if skipped:
+                logger.info(f"批量转写: {skipped} 个视频已在断点文件中完成，跳过")
+            logger.info(f"批量转写: 提交 {len(flights)} 个视频，同时最多 {self.max_in_flight} 个")
+
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in [*tasks, *flights.values()]:
+                task.cancel()
+            await asyncio.gather(*tasks, *flights.values(), return_exceptions=True)
+
+    async def transcribe_batch(self, videos: List[VideoRecord]) -> List[TranscriptResult]:
+        """批量转写，全部完成后按输入顺序返回结果"""
+        results: List[Optional[TranscriptResult]] = [None] * len(videos)
+        async for index, result in self.transcribe_stream(videos):
+            results[index] = result
+
+        success = sum(1 for r in results if not r.error)
+        logger.info(f"批量转写完成: {success}/{len(videos)} 个视频转写成功")
+        return results
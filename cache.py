@@ -0,0 +1,242 @@
+"""通用 TTL 缓存
+
+两级缓存：进程内 LRU + 可选的 SQLite 持久层。
+SQLite 文件可以被 gunicorn 的多个 worker 进程共享，进程重启后缓存依然有效。
+缓存值以 JSON 形式存储，只支持可 JSON 序列化的数据（dict / list / str / 数字）。
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# 每写入多少次清理一次 SQLite 中的过期条目
+_PURGE_EVERY = 500
+
+
+class TTLCache:
+    """带过期时间的两级缓存
+
+    - 内存层：OrderedDict 实现的 LRU，超出 max_size 时淘汰最久未使用的条目
+    - 磁盘层：可选 SQLite 文件，按 namespace 区分不同用途的缓存，多进程共享
+
+    读取顺序为内存 → 磁盘，磁盘命中后回填内存。
+    SQLite 出错时只记录日志并退化为纯内存缓存，不影响调用方。
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float = 3600.0,
+        max_size: int = 1024,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            namespace: 缓存命名空间，同一个 SQLite 文件中区分不同缓存
+            ttl: 默认过期时间（秒）
+            max_size: 内存层最大条目数
+            db_path: SQLite 文件路径，为空则只使用内存缓存
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self.db_path = db_path or None
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if self.db_path:
+            self._init_db()
+
+    # ---------- SQLite ----------
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """获取当前线程的 SQLite 连接（按线程、按进程懒加载）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            return conn
+        except sqlite3.Error as e:
+            logger.warning(f"缓存数据库连接失败({self.db_path}): {e}")
+            return None
+
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"缓存目录不可用({directory})，只使用内存缓存: {e}")
+                self.db_path = None
+                return
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " namespace TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"缓存数据库初始化失败: {e}")
+
+    def _disk_get(self, key: str) -> Any:
+        conn = self._connect()
+        if conn is None:
+            return _MISSING
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存失败: {e}")
+            return _MISSING
+        if not row or row[1] < time.time():
+            return _MISSING
+        try:
+            return json.loads(row[0]), row[1]
+        except ValueError as e:
+            # 损坏的条目删除后按未命中处理
+            logger.warning(f"缓存条目损坏，已删除: {key} - {e}")
+            self._disk_delete(key)
+            return _MISSING
+
+    def _disk_set(self, key: str, value: Any, expires_at: float):
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+                self._writes += 1
+                if self._writes % _PURGE_EVERY == 0:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+                        (self.namespace, time.time()),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"写入缓存失败: {e}")
+
+    def _disk_delete(self, key: Optional[str] = None):
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                if key is None:
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+                else:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"删除缓存失败: {e}")
+
+    # ---------- 内存 LRU ----------
+
+    def _memory_set(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    # ---------- 公共接口 ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存，不存在或已过期返回 default"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] >= now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+        if self.db_path:
+            found = self._disk_get(key)
+            if found is not _MISSING:
+                value, expires_at = found
+                self._memory_set(key, value, expires_at)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 可 JSON 序列化的值
+            ttl: 本条目的过期时间（秒），为空则使用默认 ttl
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._memory_set(key, value, expires_at)
+        if self.db_path:
+            self._disk_set(key, value, expires_at)
+
+    def delete(self, key: str):
+        """删除单个缓存条目"""
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.db_path:
+            self._disk_delete(key)
+
+    def clear(self):
+        """清空本命名空间下的全部缓存"""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            self._disk_delete()
+
+    def stats(self) -> dict:
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "memory_size": len(self._memory),
+                "persistent": bool(self.db_path),
+            }
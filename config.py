@@ -4,6 +4,7 @@
 """
 
 import os
+from typing import Optional
 
 
 class Config:
@@ -21,6 +22,9 @@ class Config:
     # 火山方舟（豆包大模型）
     ARK_API_KEY: str = os.environ.get("ARK_API_KEY", "")
     ARK_MODEL: str = os.environ.get("ARK_MODEL", "doubao-seed-2-0-mini-260215")
+    AI_CHUNK_CHARS: int = int(os.environ.get("AI_CHUNK_CHARS", "3000"))  # 超过该字数分段并行处理
+    AI_CONCURRENCY: int = int(os.environ.get("AI_CONCURRENCY", "4"))
+    AI_SUMMARY_FROM_RAW: bool = os.environ.get("AI_SUMMARY_FROM_RAW", "0") == "1"  # 摘要与纠错并行（默认关闭）
 
     # 邮件发送 (SMTP)
     SMTP_HOST: str = os.environ.get("ALERT_SMTP_HOST", "").strip('"')
@@ -29,6 +33,44 @@ class Config:
     SMTP_PASS: str = os.environ.get("ALERT_SMTP_PASS", "").strip('"')
     EMAIL_TO: str = os.environ.get("ALERT_EMAIL_TO", "").strip('"')
 
+    # 视频解析
+    RESOLVE_DELAY: float = float(os.environ.get("RESOLVE_DELAY", "2.0"))  # 批量解析时同一域名的请求间隔（秒）
+    # 批量解析的并发数（线程池大小，也是单次调用并发数的上限）；吞吐同时受 RESOLVE_RATE 限制
+    RESOLVE_CONCURRENCY: int = int(os.environ.get("RESOLVE_CONCURRENCY", "4"))
+    # 每个域名每秒最多请求数，为空则按 RESOLVE_DELAY 换算；RESOLVE_BURST 为允许的突发请求数
+    RESOLVE_RATE: Optional[float] = float(os.environ["RESOLVE_RATE"]) if os.environ.get("RESOLVE_RATE") else None
+    RESOLVE_BURST: int = int(os.environ.get("RESOLVE_BURST", "1"))
+    RESOLVE_BATCH_MAX: int = int(os.environ.get("RESOLVE_BATCH_MAX", "200"))
+
+    # 后台任务
+    JOB_DB_PATH: str = os.environ.get("JOB_DB_PATH", "data/jobs.db")
+    JOB_WORKERS: int = int(os.environ.get("JOB_WORKERS", "2"))  # 每个进程同时执行的任务数
+    PIPELINE_WORKERS: int = int(os.environ.get("PIPELINE_WORKERS", "4"))  # 每个进程同时执行的一站式处理数
+    # 火山引擎通过该地址回源下载视频（本服务的 /api/download）
+    PROXY_BASE_URL: str = os.environ.get("PROXY_BASE_URL", "http://127.0.0.1:3101").rstrip("/")
+
+    # 对外 HTTP 连接池（转写、大模型、飞书、下载代理共用）
+    HTTP_POOL_SIZE: int = int(os.environ.get("HTTP_POOL_SIZE", "20"))
+    HTTP_POOL_SIZES: str = os.environ.get("HTTP_POOL_SIZES", "")  # 按 host 设置，如 "open.feishu.cn=10,ark.cn-beijing.volces.com=16"
+    HTTP_RETRIES: int = int(os.environ.get("HTTP_RETRIES", "2"))
+
+    # 缓存
+    CACHE_DB_PATH: str = os.environ.get("CACHE_DB_PATH", "")  # SQLite 文件路径，为空则只用内存缓存
+    RESOLVE_CACHE_TTL: int = int(os.environ.get("RESOLVE_CACHE_TTL", "3600"))
+    RESOLVE_CACHE_SIZE: int = int(os.environ.get("RESOLVE_CACHE_SIZE", "2048"))
+    SHORT_LINK_CACHE_TTL: int = int(os.environ.get("SHORT_LINK_CACHE_TTL", "86400"))
+    SHORT_LINK_NEGATIVE_TTL: int = int(os.environ.get("SHORT_LINK_NEGATIVE_TTL", "300"))
+    SHORT_LINK_FIRST_HOP: bool = os.environ.get("SHORT_LINK_FIRST_HOP", "true").lower() in ("1", "true", "yes")
+    TRANSCRIPT_CACHE_TTL: int = int(os.environ.get("TRANSCRIPT_CACHE_TTL", str(30 * 86400)))
+    TRANSCRIPT_CACHE_SIZE: int = int(os.environ.get("TRANSCRIPT_CACHE_SIZE", "256"))
+    AI_CACHE_TTL: int = int(os.environ.get("AI_CACHE_TTL", str(7 * 86400)))
+    AI_CACHE_SIZE: int = int(os.environ.get("AI_CACHE_SIZE", "512"))
+    MEDIA_CACHE_DIR: str = os.environ.get("MEDIA_CACHE_DIR", "data/media")  # 视频文件缓存目录，为空则不缓存
+    MEDIA_CACHE_MAX_MB: int = int(os.environ.get("MEDIA_CACHE_MAX_MB", "2048"))  # 视频 + 音频缓存的总上限
+    AUDIO_CACHE_MAX_MB: int = int(os.environ.get("AUDIO_CACHE_MAX_MB", "256"))  # 其中分给音频缓存的部分
+    AUDIO_EXTRACT: bool = os.environ.get("AUDIO_EXTRACT", "1") == "1"  # 转写前抽取音轨，需要 ffmpeg
+    FFMPEG_PATH: str = os.environ.get("FFMPEG_PATH", "ffmpeg")
+
     @classmethod
     def is_transcribe_enabled(cls) -> bool:
         """转写功能是否已配置"""
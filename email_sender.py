@@ -2,10 +2,15 @@
 
 通过 SMTP 发送转写文字稿到指定邮箱。
 支持 QQ 邮箱等 SSL SMTP 服务。
+
+登录后的 SMTP 连接会保留复用，连续发送多封邮件（如后台发件队列、批量报告）
+只需一次 TLS 握手和登录；连接空闲超过 idle_timeout 或被服务器断开时自动重连。
 """
 
 import logging
 import smtplib
+import threading
+import time
 from dataclasses import dataclass
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -23,11 +28,84 @@ class EmailResult:
 class EmailSender:
     """SMTP 邮件发送器"""
 
-    def __init__(self, host: str, port: int, user: str, password: str):
+    def __init__(self, host: str, port: int, user: str, password: str, idle_timeout: float = 60.0):
+        """
+        Args:
+            host: SMTP 服务器
+            port: SSL 端口
+            user: 登录账号（同时作为发件人）
+            password: 授权码
+            idle_timeout: 连接空闲超过该秒数后不再复用，重新连接
+        """
         self.host = host
         self.port = port
         self.user = user
         self.password = password
+        self.idle_timeout = idle_timeout
+        self._server: Optional[smtplib.SMTP_SSL] = None
+        self._last_used: float = 0
+        # smtplib 连接不是线程安全的，同一时间只有一个线程使用
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP_SSL:
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=15)
+        server.login(self.user, self.password)
+        logger.info(f"SMTP 已登录: {self.host}")
+        return server
+
+    def _get_server(self) -> smtplib.SMTP_SSL:
+        """返回可用的已登录连接（调用方持有 _lock）"""
+        if self._server is not None:
+            if time.time() - self._last_used < self.idle_timeout:
+                try:
+                    if self._server.noop()[0] == 250:
+                        return self._server
+                except (smtplib.SMTPException, OSError):
+                    # 服务器已断开的连接会抛出 ConnectionResetError / BrokenPipeError 等 OSError
+                    pass
+            self.close_connection()
+        self._server = self._connect()
+        return self._server
+
+    def close_connection(self):
+        """关闭保留的连接（调用方持有 _lock，或确定没有其他线程在发送）"""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+    def send_message(self, to_addr: str, subject: str, html: str) -> EmailResult:
+        """发送一封 HTML 邮件，复用已登录的连接
+
+        连接在发送前已被服务器断开（SMTPServerDisconnected 或 reset / broken pipe）时重连后再发一次。
+        """
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = self.user
+        msg["To"] = to_addr
+        msg.attach(MIMEText(html, "html", "utf-8"))
+
+        try:
+            with self._lock:
+                try:
+                    self._get_server().sendmail(self.user, [to_addr], msg.as_string())
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # 连接在发送前已断开（含 reset / broken pipe）：重连后再发一次；
+                    # 超时等其他错误不重发，避免服务器实际已收下时重复投递
+                    self._server = None
+                    self._get_server().sendmail(self.user, [to_addr], msg.as_string())
+                self._last_used = time.time()
+
+            logger.info(f"邮件已发送: {subject} -> {to_addr}")
+            return EmailResult(success=True)
+        except Exception as e:
+            logger.error(f"邮件发送失败: {e}")
+            with self._lock:
+                self.close_connection()
+            return EmailResult(success=False, error=str(e))
 
     def send_transcript(
         self,
@@ -52,23 +130,7 @@ class EmailSender:
         """
         subject = f"[视频文字稿] {title}"
         html = self._build_html(title, author, source_url, duration, text, summary)
-
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = self.user
-            msg["To"] = to_addr
-            msg.attach(MIMEText(html, "html", "utf-8"))
-
-            with smtplib.SMTP_SSL(self.host, self.port, timeout=15) as server:
-                server.login(self.user, self.password)
-                server.sendmail(self.user, [to_addr], msg.as_string())
-
-            logger.info(f"邮件已发送: {subject} -> {to_addr}")
-            return EmailResult(success=True)
-        except Exception as e:
-            logger.error(f"邮件发送失败: {e}")
-            return EmailResult(success=False, error=str(e))
+        return self.send_message(to_addr, subject, html)
 
     @staticmethod
     def _build_html(title, author, source_url, duration, text, summary):
@@ -7,19 +7,164 @@
 - FEISHU_APP_ID: 飞书应用 App ID
 - FEISHU_APP_SECRET: 飞书应用 App Secret
 - FEISHU_FOLDER_TOKEN: 目标文件夹 token
+
+tenant_access_token 由 TenantTokenManager 统一管理：同一应用的所有 FeishuClient 共用一个 token，
+后台线程在过期前提前刷新，请求路径上只读取内存中的 token。
 """
 
 import logging
+import os
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import requests
 
+from http_client import get_session
+
 logger = logging.getLogger(__name__)
 
 _BASE = "https://open.feishu.cn/open-apis"
 
+# 创建子块接口单次最多 50 个 block
+_BLOCK_BATCH_SIZE = 50
+# 单个文本段落的最大字数，超长段落拆成多个 block
+_MAX_PARAGRAPH_CHARS = 2000
+# 单批写入失败的重试次数
+_BATCH_RETRIES = 3
+
+
+class TenantTokenManager:
+    """tenant_access_token 管理（线程安全）
+
+    - start() 后由后台线程获取 token，并在过期前 refresh_margin 秒刷新
+    - 刷新期间旧 token 仍然有效，调用方直接返回旧 token，不会等待
+    - 只有 token 已过期（如后台刷新连续失败）时才在请求中同步获取，并发调用只会请求一次
+
+    飞书在 token 剩余有效期小于 30 分钟时才会签发新 token，refresh_margin 默认 25 分钟。
+    """
+
+    def __init__(self, app_id: str, app_secret: str, refresh_margin: float = 1500.0):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.refresh_margin = refresh_margin
+        self._token: Optional[str] = None
+        self._expires_at: float = 0
+        self._lock = threading.Lock()  # 保护 token 状态
+        self._refresh_lock = threading.Lock()  # 同一时间只有一个刷新请求
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    def get(self) -> str:
+        """返回有效的 token，获取失败抛出 RuntimeError"""
+        token = self._valid_token()
+        if token is None:
+            with self._refresh_lock:
+                token = self._valid_token() or self._refresh()
+        self.start()
+        return token
+
+    def _valid_token(self) -> Optional[str]:
+        with self._lock:
+            if self._token and time.time() < self._expires_at:
+                return self._token
+        return None
+
+    def _refresh(self) -> str:
+        """请求新 token 并更新状态（调用方持有 _refresh_lock）"""
+        resp = get_session().post(f"{_BASE}/auth/v3/tenant_access_token/internal", json={
+            "app_id": self.app_id,
+            "app_secret": self.app_secret,
+        }, timeout=10)
+
+        data = resp.json()
+        if data.get("code") != 0:
+            raise RuntimeError(f"获取飞书 token 失败: {data.get('msg')}")
+
+        token = data["tenant_access_token"]
+        with self._lock:
+            self._token = token
+            # 留 60 秒余量，避免请求途中过期
+            self._expires_at = time.time() + data.get("expire", 7200) - 60
+        logger.info(f"飞书 token 已刷新，{data.get('expire', 7200)}s 后过期")
+        return token
+
+    def start(self):
+        """启动后台刷新线程（幂等；按进程启动，gunicorn fork 出的 worker 会启动自己的线程）
+
+        还没有 token 时后台线程会立即获取一次，提前调用可以让第一个请求也不必等待。
+        """
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._refresh_loop, name="feishu-token", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                delay = self._expires_at - self.refresh_margin - time.time()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            try:
+                with self._refresh_lock:
+                    self._refresh()
+            except (requests.RequestException, RuntimeError, ValueError) as e:
+                logger.warning(f"后台刷新飞书 token 失败: {e}，30 秒后重试")
+                if self._stop.wait(30):
+                    return
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop.set()
+
+
+_token_managers: Dict[Tuple[str, str], TenantTokenManager] = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_token_manager(app_id: str, app_secret: str) -> TenantTokenManager:
+    """同一应用共用的 TenantTokenManager"""
+    with _token_managers_lock:
+        key = (app_id, app_secret)
+        if key not in _token_managers:
+            _token_managers[key] = TenantTokenManager(app_id, app_secret)
+        return _token_managers[key]
+
+
+def text_block(content: str) -> dict:
+    """创建文本段落 block"""
+    return {
+        "block_type": 2,
+        "text": {
+            "elements": [{"text_run": {"content": content}}],
+            "style": {},
+        },
+    }
+
+
+def bold_text_block(label: str, content: str) -> dict:
+    """创建带粗体标签的文本 block"""
+    return {
+        "block_type": 2,
+        "text": {
+            "elements": [
+                {"text_run": {"content": label, "text_element_style": {"bold": True}}},
+                {"text_run": {"content": content}},
+            ],
+            "style": {},
+        },
+    }
+
+
+def divider_block() -> dict:
+    return {"block_type": 22, "divider": {}}
+
 
 @dataclass
 class FeishuDocResult:
@@ -33,30 +178,25 @@ class FeishuDocResult:
 class FeishuClient:
     """飞书文档客户端"""
 
-    def __init__(self, app_id: str, app_secret: str, folder_token: str):
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        folder_token: str,
+        token_manager: Optional[TenantTokenManager] = None,
+    ):
         self.app_id = app_id
         self.app_secret = app_secret
         self.folder_token = folder_token
-        self._token: Optional[str] = None
-        self._token_expires: float = 0
+        self.token_manager = token_manager or get_token_manager(app_id, app_secret)
+        # 后台预先获取 token
+        self.token_manager.start()
+        # 与写入内容并行执行的辅助请求（如设置权限）
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="feishu")
 
     def _get_token(self) -> str:
-        """获取 tenant_access_token（带缓存）"""
-        if self._token and time.time() < self._token_expires:
-            return self._token
-
-        resp = requests.post(f"{_BASE}/auth/v3/tenant_access_token/internal", json={
-            "app_id": self.app_id,
-            "app_secret": self.app_secret,
-        }, timeout=10)
-
-        data = resp.json()
-        if data.get("code") != 0:
-            raise RuntimeError(f"获取飞书 token 失败: {data.get('msg')}")
-
-        self._token = data["tenant_access_token"]
-        self._token_expires = time.time() + data.get("expire", 7200) - 300
-        return self._token
+        """获取 tenant_access_token（由共享的 TenantTokenManager 缓存和刷新）"""
+        return self.token_manager.get()
 
     def _headers(self) -> dict:
         return {
@@ -70,7 +210,7 @@ class FeishuClient:
         通过设置 link_share_entity 让组织内成员可以通过链接直接编辑文档。
         """
         try:
-            resp = requests.patch(
+            resp = get_session().patch(
                 f"{_BASE}/drive/v1/permissions/{doc_token}/public",
                 headers=self._headers(),
                 params={"type": "docx"},
@@ -112,10 +252,19 @@ class FeishuClient:
         """
         now = time.strftime("%Y-%m-%d %H:%M")
         doc_title = f"[{now[:10]}] {title} - {author}" if author else f"[{now[:10]}] {title}"
+        blocks = self._build_blocks(title, author, now, source_url, duration, text, summary)
+        return self.save_document(doc_title, blocks)
+
+    def save_document(self, doc_title: str, blocks: List[dict]) -> FeishuDocResult:
+        """在目标文件夹下创建文档并写入 blocks
 
+        Args:
+            doc_title: 文档标题
+            blocks: 文档内容（text_block / bold_text_block / divider_block 构建的 block 列表）
+        """
         try:
             # 1. 创建文档
-            doc_resp = requests.post(
+            doc_resp = get_session().post(
                 f"{_BASE}/docx/v1/documents",
                 headers=self._headers(),
                 json={"folder_token": self.folder_token, "title": doc_title},
@@ -131,23 +280,16 @@ class FeishuClient:
             doc_id = document["document_id"]
             doc_url = f"https://my.feishu.cn/docx/{doc_id}"
 
-            # 2. 设置文档权限（组织内可编辑）
-            self._set_doc_permission(doc_id)
+            # 2. 设置文档权限（组织内可编辑），与写入内容同时进行
+            permission = self._executor.submit(self._set_doc_permission, doc_id)
 
-            # 3. 写入元信息 + 摘要 + 正文
-            blocks = self._build_blocks(title, author, now, source_url, duration, text, summary)
-
-            create_resp = requests.post(
-                f"{_BASE}/docx/v1/documents/{doc_id}/blocks/{doc_id}/children",
-                headers=self._headers(),
-                json={"children": blocks, "index": 0},
-                timeout=30,
-            )
-            create_data = create_resp.json()
-            if create_data.get("code") != 0:
-                msg = create_data.get("msg", "未知错误")
-                logger.error(f"写入文档内容失败: {msg}")
-                return FeishuDocResult(success=False, doc_url=doc_url, error=f"写入内容失败: {msg}")
+            # 3. 写入内容
+            error = self._append_blocks(doc_id, blocks)
+            # 权限设置失败只记录日志，不影响结果；这里等待它完成后再返回链接
+            permission.result()
+            if error:
+                logger.error(f"写入文档内容失败: {error}")
+                return FeishuDocResult(success=False, doc_url=doc_url, error=f"写入内容失败: {error}")
 
             logger.info(f"文档已保存: {doc_title} -> {doc_url}")
             return FeishuDocResult(success=True, doc_url=doc_url, doc_title=doc_title)
@@ -156,36 +298,59 @@ class FeishuClient:
             logger.error(f"飞书 API 请求失败: {e}")
             return FeishuDocResult(success=False, error=f"网络请求失败: {e}")
 
-    @staticmethod
-    def _build_blocks(title, author, time_str, source_url, duration, text, summary=""):
-        """构建飞书文档 block 列表"""
+    def _append_blocks(self, doc_id: str, blocks: List[dict]) -> Optional[str]:
+        """按顺序分批写入文档根节点，成功返回 None，失败返回错误信息
 
-        def text_block(content: str) -> dict:
-            """创建文本段落 block"""
-            return {
-                "block_type": 2,
-                "text": {
-                    "elements": [{"text_run": {"content": content}}],
-                    "style": {},
-                },
-            }
-
-        def bold_text_block(label: str, content: str) -> dict:
-            """创建带粗体标签的文本 block"""
-            return {
-                "block_type": 2,
-                "text": {
-                    "elements": [
-                        {"text_run": {"content": label, "text_element_style": {"bold": True}}},
-                        {"text_run": {"content": content}},
-                    ],
-                    "style": {},
-                },
-            }
+        每批最多 _BLOCK_BATCH_SIZE 个 block，写在上一批之后；同一文档的写入需要按顺序进行，
+        所以批次依次提交。某一批失败时只重试这一批，重试使用同一个 client_token，
+        上次请求实际已成功时不会重复插入。
+        """
+        for start in range(0, len(blocks), _BLOCK_BATCH_SIZE):
+            batch = blocks[start:start + _BLOCK_BATCH_SIZE]
+            client_token = str(uuid.uuid4())
+            error = ""
+            for attempt in range(_BATCH_RETRIES):
+                if attempt:
+                    time.sleep(0.5 * 2 ** (attempt - 1))
+                try:
+                    resp = get_session().post(
+                        f"{_BASE}/docx/v1/documents/{doc_id}/blocks/{doc_id}/children",
+                        headers=self._headers(),
+                        params={"document_revision_id": -1, "client_token": client_token},
+                        json={"children": batch, "index": start},
+                        timeout=30,
+                    )
+                    data = resp.json()
+                except (requests.RequestException, ValueError) as e:
+                    error = str(e)
+                else:
+                    if data.get("code") == 0:
+                        break
+                    error = data.get("msg", "未知错误")
+                logger.warning(f"写入第 {start + 1}-{start + len(batch)} 个 block 失败（第 {attempt + 1} 次）: {error}")
+            else:
+                return f"第 {start + 1}-{start + len(batch)} 个 block: {error}"
+        logger.info(f"已写入 {len(blocks)} 个 block")
+        return None
 
-        def divider_block() -> dict:
-            return {"block_type": 22, "divider": {}}
+    @staticmethod
+    def _split_paragraph(text: str) -> List[str]:
+        """超长段落按句号拆成不超过 _MAX_PARAGRAPH_CHARS 字的片段"""
+        pieces = []
+        while len(text) > _MAX_PARAGRAPH_CHARS:
+            head = text[:_MAX_PARAGRAPH_CHARS]
+            cut = max(head.rfind(p) for p in "。！？!?；;") + 1
+            if cut <= 0:
+                cut = _MAX_PARAGRAPH_CHARS
+            pieces.append(text[:cut])
+            text = text[cut:]
+        if text:
+            pieces.append(text)
+        return pieces
 
+    @staticmethod
+    def _build_blocks(title, author, time_str, source_url, duration, text, summary=""):
+        """构建飞书文档 block 列表"""
         blocks = []
 
         # 元信息区域
@@ -210,6 +375,7 @@ class FeishuClient:
         paragraphs = text.split("\n") if "\n" in text else [text]
         for p in paragraphs:
             if p.strip():
-                blocks.append(text_block(p.strip()))
+                for piece in FeishuClient._split_paragraph(p.strip()):
+                    blocks.append(text_block(piece))
 
         return blocks
@@ -0,0 +1,110 @@
+"""共享 HTTP 连接池
+
+转写、大模型、飞书和视频下载代理等对外请求共用一个 requests.Session，
+复用 keep-alive 连接，避免每次请求都重新建立 TCP + TLS 连接。
+
+- 按 host 挂载独立的 HTTPAdapter，可以为不同服务设置不同的连接池大小
+- 连接失败自动重试；GET/HEAD 遇到 502/503/504 时退避重试，POST/PATCH 不重试（非幂等）
+- 读超时不重试，由调用方决定如何处理
+- 按进程懒加载：gunicorn fork 出的 worker 不会共用父进程的连接
+
+用法：
+    http_client.configure(pool_size=20, host_pool_sizes={"open.feishu.cn": 10})
+    session = http_client.get_session()
+    session.post(...)
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# 各服务默认的连接池大小
+_DEFAULT_HOST_POOL_SIZES = {
+    "openspeech.bytedance.com": 10,
+    "ark.cn-beijing.volces.com": 16,
+    "open.feishu.cn": 10,
+}
+
+_lock = threading.Lock()
+_settings = {
+    "pool_size": 20,
+    "retries": 2,
+    "host_pool_sizes": dict(_DEFAULT_HOST_POOL_SIZES),
+}
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+
+def parse_pool_sizes(value: str) -> Dict[str, int]:
+    """解析 "host=size,host=size" 形式的配置，格式错误的项忽略"""
+    sizes = {}
+    for item in value.split(","):
+        host, _, size = item.partition("=")
+        if host.strip() and size.strip().isdigit():
+            sizes[host.strip()] = int(size)
+    return sizes
+
+
+def configure(
+    pool_size: int = 20,
+    retries: int = 2,
+    host_pool_sizes: Optional[Dict[str, int]] = None,
+):
+    """设置连接池参数，已创建的 Session 会在下次 get_session 时按新参数重建
+
+    Args:
+        pool_size: 未单独配置的 host 的连接池大小
+        retries: 连接失败 / 网关错误的重试次数
+        host_pool_sizes: 按 host 单独设置的连接池大小，与默认值合并
+    """
+    global _session
+    with _lock:
+        _settings["pool_size"] = pool_size
+        _settings["retries"] = retries
+        _settings["host_pool_sizes"] = dict(_DEFAULT_HOST_POOL_SIZES, **(host_pool_sizes or {}))
+        _session = None
+
+
+def _make_adapter(pool_maxsize: int, retries: int) -> HTTPAdapter:
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        # 读超时不重试：阻塞查询等长请求超时后重发会让等待时间成倍增加
+        read=0,
+        status=retries,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    retries = _settings["retries"]
+    default_adapter = _make_adapter(_settings["pool_size"], retries)
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    # requests 按最长前缀匹配 adapter
+    for host, size in _settings["host_pool_sizes"].items():
+        session.mount(f"https://{host}", _make_adapter(size, retries))
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取当前进程共享的 Session（线程安全，懒加载）"""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _build_session()
+            _session_pid = os.getpid()
+            logger.debug(f"HTTP 连接池已创建 (pid={_session_pid})")
+        return _session
@@ -0,0 +1,426 @@
+"""后台任务队列
+
+把耗时操作（如语音转写）从 HTTP 请求中剥离：提交后立即返回任务 ID，
+由后台线程池执行，客户端轮询任务状态获取结果。
+
+任务持久化在本地 SQLite 文件中：
+- gunicorn 多个 worker 进程共享同一个任务库，任一进程的工作线程都可以领取任务
+- 领取任务时加租约（lease），执行期间定时续约；进程崩溃或重启后，租约过期的任务会被重新领取
+- 完成/失败只在租约仍属于自己（attempts 未变）时生效，避免被重新领取的任务重复写入结果
+- 任务状态：pending（等待）→ running（执行中）→ done（完成）/ failed（失败）
+- 失败重试的任务按 retry_backoff 指数退避，run_after 之前不会被领取
+- 任务执行过程中可以通过 JobQueue.emit 记录阶段事件，客户端按序号增量读取（见 JobStore.events）
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """后台任务"""
+    id: str
+    kind: str
+    status: str
+    payload: dict
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "payload": self.payload,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            payload=json.loads(row["payload"]),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            attempts=row["attempts"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+
+class JobStore:
+    """基于 SQLite 的任务存储，多进程、多线程安全"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " lease_until REAL NOT NULL DEFAULT 0,"
+                " run_after REAL NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "run_after" not in columns:
+                # 旧版本创建的任务库
+                conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, kind, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                " job_id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " event TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (job_id, seq))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的连接（按线程、按进程懒加载）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE 事务：保证多进程同时领取任务时只有一个成功"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def create(self, kind: str, payload: dict) -> Job:
+        """新建一个 pending 任务"""
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status=STATUS_PENDING,
+            payload=payload,
+            created_at=now,
+            updated_at=now,
+        )
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, kind, job.status, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def claim(self, kinds: List[str], lease_seconds: float, max_attempts: int) -> Optional[Job]:
+        """领取一个可执行的任务（已到 run_after 的 pending，或租约已过期的 running），没有则返回 None
+
+        租约过期且已达到最大尝试次数的任务直接标记为失败。
+        """
+        if not kinds:
+            return None
+        placeholders = ",".join("?" * len(kinds))
+        while True:
+            now = time.time()
+            with self._transaction() as conn:
+                row = conn.execute(
+                    f"SELECT * FROM jobs WHERE kind IN ({placeholders}) AND "
+                    f"((status = ? AND run_after <= ?) OR (status = ? AND lease_until < ?)) "
+                    f"ORDER BY created_at LIMIT 1",
+                    (*kinds, STATUS_PENDING, now, STATUS_RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                if row["attempts"] >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                        (STATUS_FAILED, row["error"] or "任务执行超时或进程退出", now, row["id"]),
+                    )
+                    continue
+
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (STATUS_RUNNING, now + lease_seconds, now, row["id"]),
+                )
+            job = Job.from_row(row)
+            job.status = STATUS_RUNNING
+            job.attempts += 1
+            job.updated_at = now
+            return job
+
+    def add_event(self, job_id: str, event: str, data: dict) -> int:
+        """追加一条任务事件，返回事件序号（从 1 开始递增）"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            seq = row[0] + 1
+            conn.execute(
+                "INSERT INTO job_events (job_id, seq, event, data, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, seq, event, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+        return seq
+
+    def events(self, job_id: str, after: int = 0) -> List[dict]:
+        """读取序号大于 after 的事件，按序号排列"""
+        rows = self._connect().execute(
+            "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+            (job_id, after),
+        ).fetchall()
+        return [{"seq": row["seq"], "event": row["event"], "data": json.loads(row["data"])} for row in rows]
+
+    @staticmethod
+    def _owner_clause(attempts: Optional[int]) -> tuple:
+        """attempts 不为空时只更新仍由该次领取持有的 running 任务"""
+        if attempts is None:
+            return "", ()
+        return " AND status = ? AND attempts = ?", (STATUS_RUNNING, attempts)
+
+    def renew(self, job_id: str, attempts: int, lease_seconds: float) -> bool:
+        """延长租约，任务已被其他执行者重新领取或已结束时返回 False"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (now + lease_seconds, now, job_id, STATUS_RUNNING, attempts),
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, result: dict, attempts: Optional[int] = None) -> bool:
+        """标记完成；指定 attempts 时，租约已被重新领取则不更新并返回 False"""
+        clause, args = self._owner_clause(attempts)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = 0, updated_at = ? "
+                f"WHERE id = ?{clause}",
+                (STATUS_DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, *args),
+            )
+        return cursor.rowcount > 0
+
+    def fail(
+        self,
+        job_id: str,
+        error: str,
+        retry: bool = False,
+        attempts: Optional[int] = None,
+        delay: float = 0.0,
+    ) -> bool:
+        """标记失败；retry 为 True 时放回 pending，delay 秒后才能再被领取；attempts 的含义同 complete"""
+        clause, args = self._owner_clause(attempts)
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = 0, run_after = ?, updated_at = ? "
+                f"WHERE id = ?{clause}",
+                (STATUS_PENDING if retry else STATUS_FAILED, error, now + delay, now, job_id, *args),
+            )
+        return cursor.rowcount > 0
+
+
+class JobQueue:
+    """后台任务队列
+
+    用法：
+        queue = JobQueue(JobStore("data/jobs.db"), workers=2)
+        queue.register("transcribe", handle_transcribe)  # handler(payload) -> result dict
+        job = queue.submit("transcribe", {"url": ...})
+        queue.get(job.id).status
+
+    handler 抛出异常视为失败，未达到 max_attempts 时按 retry_backoff 退避后自动重试；
+    handler 成功但结果写入失败时不会重试 handler，避免有副作用的任务（如发邮件）重复执行。
+    handler 执行期间可以调用 queue.emit(event, data) 记录当前任务的阶段事件。
+    工作线程在第一次 submit / start 时启动，空闲时每 poll_interval 秒检查一次任务库，
+    以便领取其他进程提交的任务和租约过期的任务。
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        lease_seconds: float = 600.0,
+        max_attempts: int = 2,
+        poll_interval: float = 2.0,
+        retry_backoff: float = 0.0,
+    ):
+        """
+        Args:
+            store: 任务存储
+            workers: 工作线程数，即同时执行的任务数
+            lease_seconds: 任务租约时长，执行期间每 1/3 租约时长续约一次；
+                超过后未续约视为执行者已退出，任务可被重新领取
+            max_attempts: 单个任务最大尝试次数
+            poll_interval: 空闲时检查任务库的间隔（秒）
+            retry_backoff: 失败后第一次重试前的等待时间（秒），之后每次翻倍；0 为立即重试
+        """
+        self.store = store
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self._handlers: Dict[str, Callable[[dict], dict]] = {}
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._current = threading.local()  # 当前工作线程正在执行的任务
+
+    def register(self, kind: str, handler: Callable[[dict], dict]):
+        """注册任务类型的处理函数"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, payload: dict) -> Job:
+        """提交任务，立即返回"""
+        if kind not in self._handlers:
+            raise ValueError(f"未注册的任务类型: {kind}")
+        job = self.store.create(kind, payload)
+        logger.info(f"任务已提交: {kind} job_id={job.id}")
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def current_job(self) -> Optional[Job]:
+        """在 handler 中调用：当前线程正在执行的任务"""
+        return getattr(self._current, "job", None)
+
+    def emit(self, event: str, data: dict) -> Optional[int]:
+        """在 handler 中调用：为当前任务记录一条事件，返回序号；不在任务中调用时忽略"""
+        job = getattr(self._current, "job", None)
+        if job is None:
+            return None
+        return self.store.add_event(job.id, event, data)
+
+    def start(self):
+        """启动工作线程（幂等，进程 fork 后会重新启动）"""
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"job-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        """通知工作线程退出（执行中的任务会先完成）"""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.store.claim(
+                    list(self._handlers), self.lease_seconds, self.max_attempts
+                )
+            except sqlite3.Error as e:
+                logger.error(f"领取任务失败: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run(job)
+
+    def _heartbeat(self, job: Job, done: threading.Event):
+        """handler 执行期间定时续约，租约被他人领取后停止"""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.store.renew(job.id, job.attempts, self.lease_seconds):
+                    logger.warning(f"任务租约已失效: {job.kind} job_id={job.id}")
+                    return
+            except sqlite3.Error as e:
+                logger.error(f"任务续约失败: {e}")
+
+    def _run(self, job: Job):
+        handler = self._handlers[job.kind]
+        start = time.time()
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, done), name=f"job-heartbeat-{job.id[:8]}", daemon=True
+        )
+        heartbeat.start()
+        self._current.job = job
+        try:
+            result = handler(job.payload)
+        except Exception as e:
+            done.set()
+            retry = job.attempts < self.max_attempts
+            delay = self.retry_backoff * 2 ** (job.attempts - 1) if retry else 0.0
+            logger.error(
+                f"任务失败: {job.kind} job_id={job.id} - {e}{f' ({delay:.1f}s 后重试)' if retry else ''}"
+            )
+            try:
+                self.store.fail(job.id, str(e), retry=retry, attempts=job.attempts, delay=delay)
+            except sqlite3.Error as db_error:
+                logger.error(f"更新任务状态失败: {db_error}")
+            return
+        finally:
+            done.set()
+            self._current.job = None
+        self._complete(job, result or {}, time.time() - start)
+
+    def _complete(self, job: Job, result: dict, elapsed: float):
+        """写入成功结果；写入失败时只重试写入，不把任务放回队列重新执行 handler"""
+        for attempt in range(3):
+            try:
+                if self.store.complete(job.id, result, attempts=job.attempts):
+                    logger.info(f"任务完成: {job.kind} job_id={job.id} ({elapsed:.1f}s)")
+                else:
+                    logger.warning(f"任务已被重新领取，丢弃本次结果: {job.kind} job_id={job.id}")
+                return
+            except sqlite3.Error as e:
+                logger.error(f"写入任务结果失败: {job.kind} job_id={job.id} - {e}")
+                time.sleep(1 + attempt)
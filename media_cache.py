@@ -0,0 +1,240 @@
+"""视频文件磁盘缓存
+
+代理下载的视频按媒体标识（播放地址中的 video_id）保存在本地目录，
+再次下载（包括火山引擎转写时回源拉取）直接从磁盘返回，不再请求抖音 CDN。
+
+- 写入先落到临时文件，下载完整后原子重命名，不会读到半个文件
+- 总大小超过上限时按最近访问时间（文件 mtime）淘汰最久未使用的文件
+- 同一文件正在下载时，后续请求边读临时文件边返回，不会重复请求上游
+- 目录可被 gunicorn 多个 worker 共享；"下载中共享"只在单个进程内生效
+
+同样的存储方式也用于本地生成的文件（如抽取出的音频），见 store()。
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 65536
+
+
+class _Download:
+    """一个进行中的上游下载，写入临时文件并通知等待的读取方"""
+
+    def __init__(self, key: str, tmp_path: str):
+        self.key = key
+        self.tmp_path = tmp_path
+        self.cond = threading.Condition()
+        self.size = 0  # 已写入字节数
+        self.total: Optional[int] = None  # 上游 Content-Length
+        self.content_type = "video/mp4"
+        self.ready = False  # 已收到上游响应头
+        self.done = False
+        self.error: Optional[str] = None
+
+    def wait_ready(self, timeout: float) -> bool:
+        """等待上游响应头，成功返回 True，失败或超时返回 False"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.ready or self.error is not None, timeout)
+            return self.ready and self.error is None
+
+    def iter_bytes(self, reader: BinaryIO) -> Iterator[bytes]:
+        """从临时文件读取已下载的内容，追上写入进度后等待新数据，直到下载完成"""
+        try:
+            pos = 0
+            while True:
+                with self.cond:
+                    self.cond.wait_for(
+                        lambda: self.size > pos or self.done or self.error is not None, 30
+                    )
+                    available, finished, error = self.size, self.done, self.error
+                if available > pos:
+                    data = reader.read(min(_CHUNK_SIZE, available - pos))
+                    pos += len(data)
+                    yield data
+                elif error is not None:
+                    raise IOError(f"上游下载中断: {error}")
+                elif finished:
+                    return
+        finally:
+            reader.close()
+
+
+class MediaCache:
+    """视频文件磁盘缓存
+
+    用法：
+        cache = MediaCache("data/media", max_bytes=2 << 30)
+        path = cache.lookup(key)           # 已缓存：直接 send_file(path)
+        download, reader = cache.fetch(key, open_upstream)
+        if download.wait_ready(30):
+            Response(download.iter_bytes(reader))
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 << 30, suffix: str = ".mp4"):
+        """
+        Args:
+            directory: 缓存目录
+            max_bytes: 缓存总大小上限（字节），超出后按最近访问时间淘汰
+            suffix: 缓存文件扩展名
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(directory, exist_ok=True)
+        self._downloads: Dict[str, _Download] = {}
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}{self.suffix}")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """返回已缓存文件的路径并刷新访问时间，未缓存返回 None"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def fetch(self, key: str, open_upstream: Callable[[], requests.Response]):
+        """获取（或开始）key 对应的下载，返回 (download, reader)
+
+        没有进行中的下载时在后台线程调用 open_upstream() 拉取并写入缓存；
+        reader 是临时文件的读句柄，交给 download.iter_bytes 使用。
+        """
+        with self._lock:
+            download = self._downloads.get(key)
+            if download is not None:
+                self.shared += 1
+            else:
+                self.misses += 1
+                tmp_path = f"{self._path(key)}.{uuid.uuid4().hex}.part"
+                download = _Download(key, tmp_path)
+                writer = open(tmp_path, "wb")
+                self._downloads[key] = download
+                threading.Thread(
+                    target=self._download,
+                    args=(download, writer, open_upstream),
+                    name="media-download",
+                    daemon=True,
+                ).start()
+            # 在锁内打开读句柄：下载完成时的重命名也在锁内，句柄打开后重命名不影响读取
+            reader = open(download.tmp_path, "rb")
+        return download, reader
+
+    def _download(self, download: _Download, writer: BinaryIO, open_upstream: Callable):
+        try:
+            with writer:
+                upstream = open_upstream()
+                with upstream:
+                    if upstream.status_code != 200:
+                        raise IOError(f"上游返回 {upstream.status_code}")
+                    length = upstream.headers.get("Content-Length", "")
+                    with download.cond:
+                        download.total = int(length) if length.isdigit() else None
+                        download.content_type = upstream.headers.get("Content-Type", "video/mp4")
+                        download.ready = True
+                        download.cond.notify_all()
+                    for chunk in upstream.iter_content(chunk_size=_CHUNK_SIZE):
+                        writer.write(chunk)
+                        writer.flush()
+                        with download.cond:
+                            download.size += len(chunk)
+                            download.cond.notify_all()
+            if download.total is not None and download.size != download.total:
+                raise IOError(f"内容不完整 ({download.size}/{download.total})")
+        except (requests.RequestException, OSError) as e:
+            logger.warning(f"视频缓存下载失败: {download.key} - {e}")
+            with self._lock:
+                self._downloads.pop(download.key, None)
+            with download.cond:
+                download.error = str(e)
+                download.cond.notify_all()
+            try:
+                os.unlink(download.tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            os.replace(download.tmp_path, self._path(download.key))
+            self._downloads.pop(download.key, None)
+        with download.cond:
+            download.done = True
+            download.cond.notify_all()
+        logger.info(f"视频已缓存: {download.key} ({download.size / 1048576:.1f} MB)")
+        self._evict()
+
+    def store(self, key: str, produce: Callable[[str], bool]) -> Optional[str]:
+        """生成文件并写入缓存，返回缓存文件路径
+
+        produce(tmp_path) 负责把内容写到临时路径，成功返回 True；
+        失败时删除临时文件并返回 None。
+        """
+        tmp_path = f"{self._path(key)}.{uuid.uuid4().hex}.part"
+        try:
+            ok = produce(tmp_path)
+            if ok:
+                path = self._path(key)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        if not ok:
+            return None
+        with self._lock:
+            self.misses += 1
+        self._evict()
+        return path
+
+    def _evict(self):
+        """总大小超过上限时，按 mtime 从旧到新删除已完成的缓存文件"""
+        with self._evict_lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                    logger.info(f"视频缓存淘汰: {os.path.basename(path)}")
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        """命中 / 未命中 / 共享进行中下载的次数"""
+        with self._lock:
+            requests_total = self.hits + self.misses + self.shared
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "hit_ratio": round((self.hits + self.shared) / requests_total, 4) if requests_total else 0.0,
+                "downloading": len(self._downloads),
+            }
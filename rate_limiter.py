@@ -0,0 +1,90 @@
+"""请求限速
+
+令牌桶限速器，按目标域名分别限速，用于批量请求时防止触发反爬。
+同一个限速器可以同时在线程（acquire）和 asyncio 协程（acquire_async）中使用。
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """令牌桶
+
+    以 rate 个/秒的速度补充令牌，最多积攒 burst 个。
+    采用预约方式发放令牌：令牌不足时直接预约下一个令牌并返回需要等待的时间，
+    多个调用方按到达顺序排队，不会在令牌恢复的瞬间一起涌上来。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒发放的令牌数，<= 0 表示不限速
+            burst: 令牌桶容量，即允许的瞬时突发请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """阻塞当前线程直到拿到令牌"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """在协程中等待令牌，不阻塞事件循环"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostRateLimiter:
+    """按域名限速：每个 host 一个独立的令牌桶"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每个 host 每秒允许的请求数，<= 0 表示不限速
+            burst: 每个 host 允许的瞬时突发请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """获取 URL 所属 host 的令牌桶"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str):
+        """请求 url 之前调用，阻塞直到该 host 有可用令牌"""
+        self.bucket(url).acquire()
+
+    async def acquire_async(self, url: str):
+        """acquire 的协程版本"""
+        await self.bucket(url).acquire_async()
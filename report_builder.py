@@ -0,0 +1,274 @@
+"""日报 / 周报生成
+
+把各博主新发布的视频、转写结果和 AI 摘要汇总为 models.Report，
+渲染成一份 HTML，通过一封邮件或一篇飞书文档发送。
+
+生成是增量的：
+- 每次抓取后调用 add()，只处理之前没见过的视频，已汇总的内容不会重新计算
+- 之前加入时还没有转写/摘要的视频，后续提供时补充到报告中
+- 报告状态保存在 state_path（JSON），进程重启后继续累积；进入新的日期窗口时自动开始新报告
+"""
+
+import datetime
+import html
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from email_sender import EmailResult, EmailSender
+from feishu_client import FeishuClient, FeishuDocResult, bold_text_block, divider_block, text_block
+from models import BloggerData, Report, ReportEntry, SummaryResult, TranscriptResult
+
+logger = logging.getLogger(__name__)
+
+REPORT_TYPES = {"daily": "日报", "weekly": "周报"}
+
+# 记住多少个已处理过的视频链接，用于跨窗口判断"新视频"
+_MAX_SEEN = 20000
+# 报告中每个视频展示的文字稿字数
+_EXCERPT_CHARS = 300
+
+
+def window_date(report_type: str, day: Optional[datetime.date] = None) -> str:
+    """报告窗口的日期：日报为当天，周报为所在周的周一"""
+    day = day or datetime.date.today()
+    if report_type == "weekly":
+        day -= datetime.timedelta(days=day.weekday())
+    return day.strftime("%Y-%m-%d")
+
+
+class ReportBuilder:
+    """日报 / 周报生成器
+
+    用法：
+        builder = ReportBuilder("daily", state_path="data/report_daily.json")
+        builder.add(blogger_data, transcripts, summaries)  # 每次抓取后调用，只处理新视频
+        builder.deliver_email(sender, "team@example.com")  # 或 builder.deliver_feishu(client)
+    """
+
+    def __init__(self, report_type: str = "daily", state_path: Optional[str] = None):
+        """
+        Args:
+            report_type: daily（日报）或 weekly（周报）
+            state_path: 报告状态文件路径，为空则只保存在内存中
+        """
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"未知的报告类型: {report_type}")
+        self.report_type = report_type
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._html: Optional[str] = None  # 渲染结果，报告有变化时清空
+        self._seen: List[str] = []
+        self._seen_set = set()
+        self.report = self._new_report(window_date(report_type))
+        self._load()
+
+    # ---- 状态 ----
+
+    def _new_report(self, date: str) -> Report:
+        report = Report(report_type=self.report_type, date=date)
+        self._touch(report)
+        return report
+
+    @staticmethod
+    def _touch(report: Report):
+        """报告内容变化时更新生成时间（与缓存的 HTML 保持一致）"""
+        report.generated_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"读取报告状态失败，重新开始: {e}")
+            return
+        self._seen = state.get("seen", [])
+        self._seen_set = set(self._seen)
+        report = Report.from_dict(state.get("report", {}))
+        if report.report_type == self.report_type and report.date == self.report.date:
+            self.report = report
+
+    def _save(self):
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"report": self.report.to_dict(), "seen": self._seen}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _roll_window(self):
+        """进入新的日期窗口时开始新报告（已见过的视频仍然记住）"""
+        date = window_date(self.report_type)
+        if self.report.date != date:
+            logger.info(f"{REPORT_TYPES[self.report_type]}窗口切换: {self.report.date} -> {date}")
+            self.report = self._new_report(date)
+            self._html = None
+
+    # ---- 汇总 ----
+
+    def add(
+        self,
+        blogger: BloggerData,
+        transcripts: Optional[Dict[str, TranscriptResult]] = None,
+        summaries: Optional[Dict[str, SummaryResult]] = None,
+    ) -> int:
+        """加入一个博主的抓取结果，返回新加入报告的视频数
+
+        Args:
+            blogger: 博主抓取数据
+            transcripts: 视频链接 → 转写结果
+            summaries: 视频链接 → AI 摘要
+        """
+        transcripts = transcripts or {}
+        summaries = summaries or {}
+        with self._lock:
+            self._roll_window()
+            entry = next((e for e in self.report.entries if e.blogger_url == blogger.url), None)
+            items = {item["video"]["url"]: item for item in entry.videos} if entry else {}
+
+            added = 0
+            changed = False
+            for video in blogger.videos:
+                transcript = transcripts.get(video.url)
+                summary = summaries.get(video.url)
+                item = items.get(video.url)
+                if item is not None:
+                    # 已在报告中：只补充之前缺少的转写/摘要
+                    if transcript and not item.get("transcript"):
+                        item["transcript"] = transcript.to_dict()
+                        changed = True
+                    if summary and not item.get("summary"):
+                        item["summary"] = summary.to_dict()
+                        changed = True
+                    continue
+                if video.url in self._seen_set:
+                    continue
+
+                if entry is None:
+                    entry = ReportEntry(
+                        blogger_name=blogger.name, blogger_url=blogger.url, profile=blogger.profile
+                    )
+                    self.report.entries.append(entry)
+                entry.videos.append({
+                    "video": video.to_dict(),
+                    "transcript": transcript.to_dict() if transcript else None,
+                    "summary": summary.to_dict() if summary else None,
+                })
+                self._seen.append(video.url)
+                self._seen_set.add(video.url)
+                added += 1
+
+            if added or changed:
+                entry.profile = blogger.profile
+                if len(self._seen) > _MAX_SEEN:
+                    self._seen = self._seen[-_MAX_SEEN:]
+                    self._seen_set = set(self._seen)
+                self.report.total_bloggers = len(self.report.entries)
+                self.report.total_new_videos = sum(len(e.videos) for e in self.report.entries)
+                self._touch(self.report)
+                self._html = None
+                self._save()
+            return added
+
+    def build(self) -> Report:
+        """当前窗口的报告"""
+        with self._lock:
+            self._roll_window()
+            return self.report
+
+    # ---- 渲染与发送 ----
+
+    @property
+    def title(self) -> str:
+        return f"抖音博主{REPORT_TYPES[self.report_type]} {self.report.date}"
+
+    def render_html(self) -> str:
+        """渲染 HTML（报告没有变化时直接返回上次的结果）"""
+        report = self.build()
+        with self._lock:
+            if self._html is None:
+                self._html = self._render(report)
+            return self._html
+
+    def _render(self, report: Report) -> str:
+        esc = html.escape
+        sections = []
+        for entry in report.entries:
+            videos = []
+            for item in entry.videos:
+                video, transcript, summary = item["video"], item.get("transcript"), item.get("summary")
+                parts = [
+                    f"<h4 style='margin:12px 0 4px;'><a href=\"{esc(video['url'])}\" style='color:#fe2c55;'>"
+                    f"{esc(video['title'] or '无标题')}</a></h4>",
+                    f"<p style='font-size:12px;color:#999;margin:0;'>时长 {video.get('duration_seconds', 0):.0f}s"
+                    f" · 点赞 {esc(video.get('like_count') or '-')}</p>",
+                ]
+                if summary and summary.get("summary"):
+                    parts.append(f"<p style='margin:6px 0;'>{esc(summary['summary'])}</p>")
+                    if summary.get("key_points"):
+                        points = "".join(f"<li>{esc(p)}</li>" for p in summary["key_points"])
+                        parts.append(f"<ul style='margin:4px 0;'>{points}</ul>")
+                if transcript and transcript.get("text"):
+                    excerpt = transcript["text"][:_EXCERPT_CHARS]
+                    more = "…" if len(transcript["text"]) > _EXCERPT_CHARS else ""
+                    parts.append(f"<p style='font-size:13px;color:#666;margin:6px 0;'>{esc(excerpt)}{more}</p>")
+                videos.append("".join(parts))
+
+            profile = entry.profile
+            sections.append(
+                f"<h3 style='color:#1a1a1a;border-left:4px solid #fe2c55;padding-left:8px;'>"
+                f"<a href=\"{esc(entry.blogger_url)}\" style='color:#1a1a1a;'>{esc(entry.blogger_name)}</a>"
+                f" <span style='font-size:13px;color:#999;'>粉丝 {esc(profile.followers or '-')}"
+                f" · 新视频 {len(entry.videos)} 个</span></h3>"
+                + "".join(videos)
+            )
+
+        body = "".join(sections) or "<p>本期没有新视频。</p>"
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;max-width:680px;margin:0 auto;padding:20px;color:#333;">
+<h2 style="color:#1a1a1a;border-bottom:2px solid #fe2c55;padding-bottom:8px;">📊 {esc(self.title)}</h2>
+<p style="font-size:13px;color:#666;">共 {report.total_bloggers} 位博主、{report.total_new_videos} 个新视频 · 生成于 {report.generated_at}</p>
+{body}
+<hr style="border:none;border-top:1px solid #eee;margin:24px 0;">
+<p style="font-size:12px;color:#999;">此邮件由抖音视频解析工具自动发送</p>
+</body></html>"""
+
+    def _feishu_blocks(self, report: Report) -> List[dict]:
+        blocks = [
+            bold_text_block("博主数：", str(report.total_bloggers)),
+            bold_text_block("新视频：", str(report.total_new_videos)),
+            bold_text_block("生成时间：", report.generated_at),
+        ]
+        for entry in report.entries:
+            blocks.append(divider_block())
+            blocks.append(bold_text_block(f"👤 {entry.blogger_name}", f"  {entry.blogger_url}"))
+            for item in entry.videos:
+                video, transcript, summary = item["video"], item.get("transcript"), item.get("summary")
+                blocks.append(bold_text_block("🎬 ", f"{video['title'] or '无标题'}  {video['url']}"))
+                if summary and summary.get("summary"):
+                    blocks.append(text_block(summary["summary"]))
+                    for point in summary.get("key_points", []):
+                        blocks.append(text_block(f"• {point}"))
+                if transcript and transcript.get("text"):
+                    blocks.append(text_block(transcript["text"][:_EXCERPT_CHARS]))
+        return blocks
+
+    def deliver_email(self, sender: EmailSender, to_addr: str) -> EmailResult:
+        """把报告作为一封邮件发送"""
+        report = self.build()
+        subject = f"[{REPORT_TYPES[self.report_type]}] {report.date} 共 {report.total_new_videos} 个新视频"
+        return sender.send_message(to_addr, subject, self.render_html())
+
+    def deliver_feishu(self, client: FeishuClient) -> FeishuDocResult:
+        """把报告保存为一篇飞书文档"""
+        report = self.build()
+        return client.save_document(self.title, self._feishu_blocks(report))
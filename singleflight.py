@@ -0,0 +1,118 @@
+"""请求合并（single-flight）
+
+同一个 key 的并发调用只执行一次，其余调用方等待并共享同一个结果（或同一个异常）。
+用于热门链接短时间内被大量重复解析时，避免对上游发起重复请求。
+
+只在单个进程内生效；多个 gunicorn worker 之间通过共享缓存去重。
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """线程版请求合并"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """执行 fn(*args, **kwargs)；同一 key 已有调用在进行时，等待并返回它的结果"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict:
+        """实际执行次数 / 被合并的调用次数"""
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "in_flight": len(self._calls)}
+
+
+class _LeaderCancelled(Exception):
+    """AsyncSingleFlight 中执行调用的一方被取消，等待方应重新发起调用"""
+
+
+class AsyncSingleFlight:
+    """asyncio 版请求合并，只能在同一个事件循环中使用"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """await fn(*args, **kwargs)；同一 key 已有调用在进行时，等待并返回它的结果
+
+        执行调用的一方被取消时，只有它自己收到 CancelledError，
+        其他等待方中的一个接手重新执行，其余继续等待新的调用。
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            self.shared += 1
+            try:
+                # shield：某个等待方被取消时，不影响进行中的调用和其他等待方
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待方时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        """实际执行次数 / 被合并的调用次数"""
+        return {"executed": self.executed, "shared": self.shared, "in_flight": len(self._calls)}
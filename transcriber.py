@@ -13,17 +13,46 @@
 - VOLC_ACCESS_TOKEN: 火山引擎 Bearer Token
 """
 
+import hashlib
 import logging
 import time
 from dataclasses import dataclass
 from typing import Optional
+from urllib.parse import parse_qs, quote, urlparse
 
-import requests
+from cache import TTLCache
+from http_client import get_session
 
 logger = logging.getLogger(__name__)
 
 _BASE_URL = "https://openspeech.bytedance.com/api/v1/vc"
 
+# 抖音播放地址（/aweme/v1/play/?video_id=...）所在的域名，只有这些域名上的 video_id 可信
+_PLAY_HOSTS = frozenset({
+    "www.douyin.com",
+    "douyin.com",
+    "www.iesdouyin.com",
+    "aweme.snssdk.com",
+    "api.amemv.com",
+})
+# 播放地址跳转到的抖音 CDN 域名后缀（视频、音乐）
+_MEDIA_HOST_SUFFIXES = (".douyinvod.com", ".zjcdn.com", ".douyinstatic.com", ".bytecdn.cn")
+
+# submit 接口的识别参数（appid 另外传入）
+_SUBMIT_PARAMS = {
+    "language": "zh-CN",
+    "use_itn": "True",       # 数字转换（中文数字→阿拉伯数字）
+    "use_capitalize": "True",
+    "use_punc": "True",       # 添加标点
+    "caption_type": "speech",  # 只识别说话部分
+    "max_lines": 1,
+    "words_per_line": 40,
+}
+
+# query 返回的 code：0 完成，2000 处理中，其他为失败
+_CODE_DONE = 0
+_CODE_PROCESSING = 2000
+
 
 @dataclass
 class TranscriptResult:
@@ -38,22 +67,80 @@ class TranscriptResult:
             self.utterances = []
 
 
+def is_douyin_media_url(url: str) -> bool:
+    """是否为抖音播放域名或 CDN 上的 http(s) 地址"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    return host in _PLAY_HOSTS or host.endswith(_MEDIA_HOST_SUFFIXES)
+
+
+def proxy_url(base_url: str, endpoint: str, play_url: str) -> str:
+    """本服务的代理地址：火山引擎通过它回源下载，绕过抖音 Referer 防盗链
+
+    Args:
+        base_url: 本服务对外地址（PROXY_BASE_URL）
+        endpoint: /api/download（完整视频）或 /api/audio（音轨）
+        play_url: 抖音播放地址
+    """
+    return f"{base_url}{endpoint}?url={quote(play_url, safe='')}"
+
+
+def media_fingerprint(play_url: str) -> str:
+    """视频文件的稳定标识，用作转写结果的缓存键
+
+    抖音播放地址中的 video_id 即视频文件 ID，同一视频每次解析得到的值相同；
+    其他地址（如音乐 mp3、非抖音域名上带 video_id 的地址）使用完整 URL 的哈希，
+    避免任意地址冒用 video_id 写入共享缓存。
+    """
+    parsed = urlparse(play_url)
+    if parsed.scheme in ("http", "https") and (parsed.hostname or "") in _PLAY_HOSTS:
+        video_id = parse_qs(parsed.query).get("video_id", [""])[0]
+        if video_id:
+            return f"vid:{video_id}"
+    return "url:" + hashlib.sha1(play_url.encode("utf-8")).hexdigest()
+
+
+def result_from_query(result: dict) -> TranscriptResult:
+    """query 接口的最终返回 → TranscriptResult（拼接所有 utterances 的 text）"""
+    code = result.get("code", -1)
+    if code != _CODE_DONE:
+        msg = result.get("message", "未知错误")
+        logger.error(f"转写失败: code={code}, message={msg}")
+        return TranscriptResult(text="", error=f"转写失败({code}): {msg}")
+
+    utterances = result.get("utterances", [])
+    duration = result.get("duration", 0.0)
+    full_text = "".join(u.get("text", "") for u in utterances)
+    logger.info(f"转写完成: {len(utterances)} 句, {duration:.1f}s, {len(full_text)} 字")
+    return TranscriptResult(text=full_text, duration=duration, utterances=utterances)
+
+
 class Transcriber:
     """火山引擎语音转文字
 
     使用音视频字幕生成 API，支持直接传入音频/视频 URL。
     """
 
-    def __init__(self, app_id: str, access_token: str, timeout: float = 120.0):
+    def __init__(
+        self,
+        app_id: str,
+        access_token: str,
+        timeout: float = 120.0,
+        cache: Optional[TTLCache] = None,
+    ):
         """
         Args:
             app_id: 火山引擎应用 ID
             access_token: Bearer Token
             timeout: 查询超时时间（秒），默认 120s
+            cache: 转写结果缓存（媒体标识 → 文本/分句/时长），为空则不缓存
         """
         self.app_id = app_id
         self.access_token = access_token
         self.timeout = timeout
+        self.cache = cache
 
     def _headers(self) -> dict:
         return {
@@ -63,18 +150,9 @@ class Transcriber:
 
     def _submit(self, audio_url: str) -> Optional[str]:
         """提交音频 URL，返回任务 ID"""
-        resp = requests.post(
+        resp = get_session().post(
             f"{_BASE_URL}/submit",
-            params={
-                "appid": self.app_id,
-                "language": "zh-CN",
-                "use_itn": "True",       # 数字转换（中文数字→阿拉伯数字）
-                "use_capitalize": "True",
-                "use_punc": "True",       # 添加标点
-                "caption_type": "speech",  # 只识别说话部分
-                "max_lines": 1,
-                "words_per_line": 40,
-            },
+            params={"appid": self.app_id, **_SUBMIT_PARAMS},
             json={"url": audio_url},
             headers=self._headers(),
             timeout=30,
@@ -100,7 +178,7 @@ class Transcriber:
             job_id: 任务 ID
             blocking: 是否使用阻塞模式（服务端等待完成后返回）
         """
-        resp = requests.get(
+        resp = get_session().get(
             f"{_BASE_URL}/query",
             params={
                 "appid": self.app_id,
@@ -117,15 +195,34 @@ class Transcriber:
 
         return resp.json()
 
-    def transcribe(self, audio_url: str) -> TranscriptResult:
+    def get_cached(self, cache_key: str) -> Optional[TranscriptResult]:
+        """读取已缓存的转写结果，没有返回 None"""
+        if self.cache is None or not cache_key:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        logger.info(f"转写缓存命中: {cache_key}")
+        return TranscriptResult(
+            text=cached.get("text", ""),
+            duration=cached.get("duration", 0.0),
+            utterances=cached.get("utterances", []),
+        )
+
+    def transcribe(self, audio_url: str, cache_key: Optional[str] = None) -> TranscriptResult:
         """转写音频 URL 为文字
 
         Args:
             audio_url: 音频/视频的可访问 URL
+            cache_key: 缓存键（一般为 media_fingerprint(播放地址)），为空则不读写缓存
 
         Returns:
             TranscriptResult 包含完整文本和分句信息
         """
+        cached = self.get_cached(cache_key)
+        if cached is not None:
+            return cached
+
         # 1. 提交任务
         job_id = self._submit(audio_url)
         if not job_id:
@@ -138,31 +235,23 @@ class Transcriber:
         code = result.get("code", -1)
 
         # 还在处理中（阻塞模式下一般不会出现，但做个兜底）
-        if code == 2000:
+        if code == _CODE_PROCESSING:
             # 轮询等待
             start = time.time()
             while time.time() - start < self.timeout:
                 time.sleep(3)
                 result = self._query(job_id, blocking=False)
                 code = result.get("code", -1)
-                if code != 2000:
+                if code != _CODE_PROCESSING:
                     break
                 logger.info("转写处理中，继续等待...")
 
-        if code != 0:
-            msg = result.get("message", "未知错误")
-            logger.error(f"转写失败: code={code}, message={msg}")
-            return TranscriptResult(text="", error=f"转写失败({code}): {msg}")
-
         # 3. 拼接文本
-        utterances = result.get("utterances", [])
-        duration = result.get("duration", 0.0)
-        full_text = "".join(u.get("text", "") for u in utterances)
-
-        logger.info(f"转写完成: {len(utterances)} 句, {duration:.1f}s, {len(full_text)} 字")
-
-        return TranscriptResult(
-            text=full_text,
-            duration=duration,
-            utterances=utterances,
-        )
+        transcript = result_from_query(result)
+        if not transcript.error and cache_key and self.cache is not None:
+            self.cache.set(cache_key, {
+                "text": transcript.text,
+                "duration": transcript.duration,
+                "utterances": transcript.utterances,
+            })
+        return transcript
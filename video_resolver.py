@@ -5,14 +5,22 @@
 """
 
 import asyncio
+import codecs
 import logging
 import re
 import json
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from cache import TTLCache
 from models import VideoRecord
+from rate_limiter import HostRateLimiter
+from singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +37,20 @@ _HEADERS = {
 _SHARE_URL_TEMPLATE = "https://www.iesdouyin.com/share/video/{aweme_id}/"
 _PLAY_URL_TEMPLATE = "https://www.douyin.com/aweme/v1/play/?video_id={video_id}"
 
+# 流式读取分享页时每次读取的字节数
+_STREAM_CHUNK_SIZE = 16 * 1024
+# 读到 _ROUTER_DATA 后，剩余内容不超过该字节数时读完，让连接回到连接池复用；
+# 超过则直接关闭连接（重新建连比下载整页剩余部分更快）
+_DRAIN_MAX_BYTES = 64 * 1024
+
+_ROUTER_DATA_MARKER = "window._ROUTER_DATA"
+_SCRIPT_END = "</script>"
+_ASSIGN_RE = re.compile(r"\s*=\s*")
+_VIDEO_PAGE_RE = re.compile(r'"video_\(id\)/page"\s*:')
+_VIDEO_INFO_RE = re.compile(r'"videoInfoRes"\s*:')
+_ITEM_LIST_RE = re.compile(r'"item_list"\s*:\s*')
+_JSON_DECODER = json.JSONDecoder()
+
 
 def extract_url_from_text(text: str) -> Optional[str]:
     """从分享文本中提取抖音链接
@@ -57,23 +79,40 @@ def extract_url_from_text(text: str) -> Optional[str]:
     return None
 
 
-def resolve_short_url(short_url: str, timeout: float = 10.0) -> Optional[str]:
+def resolve_short_url(
+    short_url: str,
+    timeout: float = 10.0,
+    follow_redirects: bool = True,
+    session: Optional[requests.Session] = None,
+) -> Optional[str]:
     """解析抖音短链接，跟踪重定向获取最终长链接
 
     短链接（如 https://v.douyin.com/xxx）会 302 重定向到长链接。
-    通过 HEAD 请求 + allow_redirects 跟踪重定向链，拿到最终 URL。
+    默认通过 HEAD 请求 + allow_redirects 跟踪整条重定向链，拿到最终 URL。
+
+    Args:
+        short_url: 短链接
+        timeout: 请求超时时间
+        follow_redirects: False 时只读取第一跳的 Location 头，不继续跟踪重定向链
+            （v.douyin.com 的第一跳已经是带 aweme_id 的分享页地址）
+        session: 复用的 HTTP Session，为空则直接用 requests
 
     Returns:
-        最终重定向后的 URL，失败返回 None
+        重定向后的 URL（没有重定向时为原链接），网络请求失败返回 None
     """
+    http = session or requests
     try:
-        resp = requests.head(
+        resp = http.head(
             short_url,
             headers=_HEADERS,
-            allow_redirects=True,
+            allow_redirects=follow_redirects,
             timeout=timeout,
         )
-        final_url = resp.url
+        if follow_redirects:
+            final_url = resp.url
+        else:
+            location = resp.headers.get("Location", "")
+            final_url = urljoin(short_url, location) if location else resp.url
         logger.info(f"短链接重定向: {short_url} -> {final_url}")
         return final_url
     except requests.RequestException as e:
@@ -81,6 +120,197 @@ def resolve_short_url(short_url: str, timeout: float = 10.0) -> Optional[str]:
         return None
 
 
+def extract_short_code(short_url: str) -> Optional[str]:
+    """从短链接中提取短码，如 https://v.douyin.com/pblL5pmtw_4/ -> pblL5pmtw_4"""
+    match = re.search(r"v\.douyin\.com/([A-Za-z0-9_\-]+)", short_url)
+    return match.group(1) if match else None
+
+
+def _apply_video_info(video: VideoRecord, info: dict):
+    """把解析得到的视频信息填充到 VideoRecord
+
+    标题、作者只在原记录为空时填充；播放地址为空时不覆盖时长。
+    """
+    if info.get("title") and not video.title:
+        video.title = info["title"]
+    if info.get("author") and not video.author:
+        video.author = info["author"]
+    if info.get("play_url"):
+        video.video_play_url = info["play_url"]
+        video.duration_seconds = info.get("duration_seconds", 0.0)
+
+
+def extract_input_url(text: str) -> Optional[str]:
+    """把用户输入规整为抖音链接
+
+    纯 URL 直接返回；分享文本则从中提取链接，提取不到返回 None。
+    """
+    # 判断输入是否为纯 URL 还是包含其他文本的分享文本
+    # 纯 URL 以 http 开头且不含空格；否则视为分享文本，需要提取
+    is_plain_url = text.strip().startswith("http") and " " not in text.strip()
+    if is_plain_url:
+        return text
+    extracted = extract_url_from_text(text)
+    if extracted:
+        logger.info(f"从分享文本中提取到 URL: {extracted}")
+        return extracted
+    logger.warning(f"无法从文本中提取抖音链接: {text}")
+    return None
+
+
+class RouterDataScanner:
+    """增量扫描分享页 HTML，提取 window._ROUTER_DATA 的 JSON 文本
+
+    逐块 feed 响应内容，_ROUTER_DATA 所在的 <script> 一结束就返回结果，
+    调用方可以立即停止读取剩余的 HTML。
+    找到标记之前只保留缓冲区末尾一小段，内存占用与页面大小无关。
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._found_marker = False
+        self._search_from = 0
+        self.bytes_read = 0
+        self.result: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """输入一块响应内容，已拿到完整 _ROUTER_DATA 时返回 True"""
+        if self.result is not None:
+            return True
+        self.bytes_read += len(chunk)
+        self._buffer += self._decoder.decode(chunk)
+
+        while True:
+            if not self._found_marker:
+                idx = self._buffer.find(_ROUTER_DATA_MARKER)
+                if idx < 0:
+                    # 保留可能被截断的半个标记
+                    self._buffer = self._buffer[-len(_ROUTER_DATA_MARKER):]
+                    return False
+                self._buffer = self._buffer[idx + len(_ROUTER_DATA_MARKER):]
+                self._found_marker = True
+                self._search_from = 0
+
+            end = self._buffer.find(_SCRIPT_END, self._search_from)
+            if end < 0:
+                self._search_from = max(0, len(self._buffer) - len(_SCRIPT_END))
+                return False
+
+            segment = self._buffer[:end]
+            assign = _ASSIGN_RE.match(segment)
+            if assign:
+                self.result = segment[assign.end():]
+                self._buffer = ""
+                return True
+
+            # 标记后面不是赋值语句（比如出现在其他脚本里），继续找下一个
+            self._buffer = self._buffer[end + len(_SCRIPT_END):]
+            self._found_marker = False
+
+
+def read_router_data(chunks: Iterable[bytes]) -> Optional[str]:
+    """从响应内容块中读取 _ROUTER_DATA，读到即停止，没找到返回 None"""
+    scanner = RouterDataScanner()
+    for chunk in chunks:
+        if chunk and scanner.feed(chunk):
+            break
+    return scanner.result
+
+
+def drain_response(chunks: Iterator[bytes], max_bytes: int = _DRAIN_MAX_BYTES) -> bool:
+    """读完响应剩余内容（最多 max_bytes），读完返回 True，连接可以回到连接池"""
+    remaining = max_bytes
+    for chunk in chunks:
+        remaining -= len(chunk)
+        if remaining < 0:
+            return False
+    return True
+
+
+def _load_video_info_res(router_data: str) -> dict:
+    """从 _ROUTER_DATA 文本中取出 loaderData["video_(id)/page"].videoInfoRes
+
+    优先只解码 video_(id)/page 下 videoInfoRes 里的 item_list 数组，跳过页面其余大量无关数据；
+    找不到（如图文 note_(id)/page）或 item_list 为空（需要读取 filter_list）时再完整解析。
+    """
+    page_match = _VIDEO_PAGE_RE.search(router_data)
+    info_match = _VIDEO_INFO_RE.search(router_data, page_match.end()) if page_match else None
+    if info_match:
+        list_match = _ITEM_LIST_RE.search(router_data, info_match.end())
+        if list_match:
+            try:
+                item_list, _ = _JSON_DECODER.raw_decode(router_data, list_match.end())
+                if isinstance(item_list, list) and item_list:
+                    return {"item_list": item_list}
+            except json.JSONDecodeError:
+                pass
+
+    json_data = json.loads(router_data)
+    video_page = json_data.get("loaderData", {}).get("video_(id)/page", {})
+    return video_page.get("videoInfoRes", {})
+
+
+def parse_router_data(router_data: str, label: str = "") -> Optional[dict]:
+    """从 _ROUTER_DATA 文本中提取视频信息
+
+    Args:
+        router_data: window._ROUTER_DATA 赋值的 JSON 文本
+        label: 日志中标识视频的文字（一般是标题）
+
+    Returns:
+        包含 play_url、duration_seconds、title、author 的 dict，
+        页面中没有视频数据时返回 None；JSON 格式错误时抛出 JSONDecodeError
+    """
+    video_info = _load_video_info_res(router_data)
+    item_list = video_info.get("item_list", [])
+
+    if not item_list:
+        # 检查是否被过滤（图文类型等）
+        filter_list = video_info.get("filter_list", [])
+        if filter_list:
+            reason = filter_list[0].get("filter_reason", "unknown")
+            logger.info(f"视频被过滤({reason}): {label}")
+        else:
+            logger.warning(f"item_list 为空: {label}")
+        return None
+
+    item = item_list[0]
+    video_uri = item.get("video", {}).get("play_addr", {}).get("uri", "")
+    duration_ms = item.get("video", {}).get("duration", 0)
+
+    # 提取视频标题（desc）和作者昵称
+    info = {
+        "play_url": "",
+        "duration_seconds": 0.0,
+        "title": item.get("desc", "").strip(),
+        "author": item.get("author", {}).get("nickname", "").strip(),
+    }
+
+    if video_uri:
+        if "mp3" not in video_uri:
+            info["play_url"] = _PLAY_URL_TEMPLATE.format(video_id=video_uri)
+        else:
+            info["play_url"] = video_uri
+        info["duration_seconds"] = duration_ms / 1000.0
+        logger.info(
+            f"解析成功: {label or info['title']} | 作者: {info['author']} | "
+            f"{info['duration_seconds']:.1f}s | {video_uri}"
+        )
+    else:
+        logger.warning(f"未找到 video_uri: {label}")
+    return info
+
+
+def parse_share_page(html: str, label: str = "") -> Optional[dict]:
+    """从完整的 iesdouyin 分享页 HTML 中提取视频信息，返回值同 parse_router_data"""
+    router_data = read_router_data([html.encode("utf-8")])
+    if router_data is None:
+        logger.warning(f"未找到 _ROUTER_DATA: {label}")
+        return None
+    return parse_router_data(router_data, label)
+
+
 def extract_aweme_id(video_url: str) -> Optional[str]:
     """从抖音视频 URL 中提取 aweme_id
 
@@ -96,27 +326,66 @@ class VideoResolver:
     """抖音视频解析器
 
     通过 iesdouyin 接口解析视频，获取无水印播放地址。
-    支持单个解析和批量解析，内置请求间隔控制。
+    支持单个解析和批量解析，内置请求间隔控制和可选的解析结果缓存。
+    批量解析按 host 令牌桶限速，同时保持最多 concurrency 个请求并发。
     """
 
-    def __init__(self, delay: float = 2.0, timeout: float = 15.0):
+    def __init__(
+        self,
+        delay: float = 2.0,
+        timeout: float = 15.0,
+        cache: Optional[TTLCache] = None,
+        short_link_cache: Optional[TTLCache] = None,
+        negative_ttl: float = 300.0,
+        first_hop_only: bool = False,
+        concurrency: int = 4,
+        rate: Optional[float] = None,
+        burst: int = 1,
+    ):
         """
         Args:
             delay: 批量解析时每次请求的间隔秒数，防止触发反爬
             timeout: 单次请求超时时间
+            cache: 解析结果缓存（aweme_id → 播放地址/时长/标题/作者），为空则不缓存
+            short_link_cache: 短链接缓存（短码 → aweme_id），为空则不缓存
+            negative_ttl: 无效短链接的缓存时间（秒），避免反复请求坏链接
+            first_hop_only: 短链接只读取第一跳 Location，拿不到 aweme_id 时再跟踪完整重定向链
+            concurrency: 批量解析时同时进行的请求数
+            rate: 批量解析时每个 host 每秒最多请求数，为空则按 delay 换算（1 / delay）
+            burst: 每个 host 允许的突发请求数，配合 concurrency 提高批量解析吞吐
         """
         self.delay = delay
         self.timeout = timeout
+        self.cache = cache
+        self.short_link_cache = short_link_cache
+        self.negative_ttl = negative_ttl
+        self.first_hop_only = first_hop_only
+        self.concurrency = max(1, concurrency)
         self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 合并并发的相同请求：同一视频/短链接同时只有一个上游请求
+        self.inflight = SingleFlight()
+        # 批量解析的限速器：每个 host 按 rate 限速（默认每 delay 秒一个请求，与原来的固定间隔等效）
+        if rate is None:
+            rate = 1.0 / delay if delay > 0 else 0.0
+        self._batch_limiter = HostRateLimiter(rate=rate, burst=max(1, burst))
 
     def _get_session(self) -> requests.Session:
         """获取 HTTP Session（懒加载，绕过系统代理）"""
-        if self._session is None:
-            self._session = requests.Session()
-            self._session.trust_env = False  # 绕过环境变量中的代理
-        return self._session
-
-    def resolve(self, video: VideoRecord) -> VideoRecord:
+        with self._session_lock:
+            if self._session is None:
+                self._session = requests.Session()
+                self._session.trust_env = False  # 绕过环境变量中的代理
+                # 连接池至少容纳批量解析的并发数
+                adapter = HTTPAdapter(pool_maxsize=max(10, self.concurrency))
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def resolve(
+        self, video: VideoRecord, rate_limiter: Optional[HostRateLimiter] = None
+    ) -> VideoRecord:
         """解析单个视频，填充 aweme_id、video_play_url、duration_seconds
 
         支持三种输入：
@@ -124,31 +393,21 @@ class VideoResolver:
         2. 短链接：https://v.douyin.com/xxx
         3. 分享文本：包含链接的混合文本（自动提取 URL）
 
+        配置了 cache 时，同一 aweme_id 在有效期内直接返回缓存结果，不再请求分享页。
+        传入 rate_limiter 时，每次发出 HTTP 请求前按目标 host 限速（缓存命中不消耗令牌）。
+        并发解析同一视频或同一短链接时，只有一个线程请求上游，其余线程共享其结果。
         解析失败不抛异常，只记录日志，返回原始 VideoRecord（play_url 为空）。
         """
-        url = video.url
-
-        # 判断输入是否为纯 URL 还是包含其他文本的分享文本
-        # 纯 URL 以 http 开头且不含空格；否则视为分享文本，需要提取
-        is_plain_url = url.strip().startswith("http") and " " not in url.strip()
-        if not is_plain_url:
-            extracted = extract_url_from_text(url)
-            if extracted:
-                logger.info(f"从分享文本中提取到 URL: {extracted}")
-                url = extracted
-            else:
-                logger.warning(f"无法从文本中提取抖音链接: {url}")
-                return video
+        url = extract_input_url(video.url)
+        if not url:
+            return video
 
         # 提取 aweme_id（长链接直接提取）
         aweme_id = extract_aweme_id(url)
 
         # 如果提取失败，可能是短链接，尝试重定向解析
         if not aweme_id and "v.douyin.com" in url:
-            logger.info(f"检测到短链接，尝试重定向解析: {url}")
-            final_url = resolve_short_url(url, timeout=self.timeout)
-            if final_url:
-                aweme_id = extract_aweme_id(final_url)
+            aweme_id = self._resolve_short_link(url, rate_limiter)
 
         if not aweme_id:
             logger.warning(f"无法从 URL 提取 aweme_id: {url}")
@@ -156,62 +415,119 @@ class VideoResolver:
 
         video.aweme_id = aweme_id
 
-        try:
-            share_url = _SHARE_URL_TEMPLATE.format(aweme_id=aweme_id)
-            session = self._get_session()
-            resp = session.get(share_url, headers=_HEADERS, timeout=self.timeout)
-
-            if resp.status_code != 200:
-                logger.warning(f"请求失败 HTTP {resp.status_code}: {video.title}")
-                return video
+        info = self._get_video_info(aweme_id, video, rate_limiter)
+        if info:
+            _apply_video_info(video, info)
+        return video
 
-            # 提取 _ROUTER_DATA
-            match = re.findall(
-                r"window\._ROUTER_DATA\s*=\s*(.*?)</script>", resp.text
-            )
-            if not match:
-                logger.warning(f"未找到 _ROUTER_DATA: {video.title}")
-                return video
+    def _resolve_short_link(
+        self, url: str, rate_limiter: Optional[HostRateLimiter] = None
+    ) -> Optional[str]:
+        """短链接 → aweme_id，带缓存
 
-            json_data = json.loads(match[0])
-            video_page = json_data.get("loaderData", {}).get("video_(id)/page", {})
-            video_info = video_page.get("videoInfoRes", {})
-            item_list = video_info.get("item_list", [])
-
-            if not item_list:
-                # 检查是否被过滤（图文类型等）
-                filter_list = video_info.get("filter_list", [])
-                if filter_list:
-                    reason = filter_list[0].get("filter_reason", "unknown")
-                    logger.info(f"视频被过滤({reason}): {video.title}")
-                else:
-                    logger.warning(f"item_list 为空: {video.title}")
-                return video
+        无效短链接（重定向后拿不到 aweme_id）也会缓存，使用较短的 negative_ttl；
+        网络请求失败不缓存，下次重试。
+        """
+        code = extract_short_code(url)
+        if code and self.short_link_cache is not None:
+            cached = self.short_link_cache.get(code)
+            if cached is not None:
+                logger.info(f"短链接缓存命中: {code} -> {cached or '无效链接'}")
+                return cached or None
+
+        return self.inflight.do(
+            f"short:{code or url}", self._load_short_link, url, code, rate_limiter
+        )
 
-            item = item_list[0]
-            video_uri = item.get("video", {}).get("play_addr", {}).get("uri", "")
-            duration_ms = item.get("video", {}).get("duration", 0)
-
-            # 提取视频标题（desc）和作者昵称
-            desc = item.get("desc", "").strip()
-            author_nickname = item.get("author", {}).get("nickname", "").strip()
-            if desc and not video.title:
-                video.title = desc
-            if author_nickname and not video.author:
-                video.author = author_nickname
-
-            if video_uri:
-                if "mp3" not in video_uri:
-                    video.video_play_url = _PLAY_URL_TEMPLATE.format(video_id=video_uri)
-                else:
-                    video.video_play_url = video_uri
-                video.duration_seconds = duration_ms / 1000.0
-                logger.info(
-                    f"解析成功: {video.title} | 作者: {video.author} | "
-                    f"{video.duration_seconds:.1f}s | {video_uri}"
-                )
+    def _load_short_link(
+        self, url: str, code: Optional[str], rate_limiter: Optional[HostRateLimiter]
+    ) -> Optional[str]:
+        """请求短链接重定向并写入短链接缓存"""
+        logger.info(f"检测到短链接，尝试重定向解析: {url}")
+        session = self._get_session()
+        if rate_limiter is not None:
+            rate_limiter.acquire(url)
+        final_url = None
+        if self.first_hop_only:
+            final_url = resolve_short_url(
+                url, timeout=self.timeout, follow_redirects=False, session=session
+            )
+            if final_url and not extract_aweme_id(final_url):
+                final_url = None
+        if not final_url:
+            final_url = resolve_short_url(url, timeout=self.timeout, session=session)
+        if final_url is None:
+            return None
+
+        aweme_id = extract_aweme_id(final_url)
+        if code and self.short_link_cache is not None:
+            if aweme_id:
+                self.short_link_cache.set(code, aweme_id)
             else:
-                logger.warning(f"未找到 video_uri: {video.title}")
+                self.short_link_cache.set(code, "", ttl=self.negative_ttl)
+        return aweme_id
+
+    def _get_video_info(
+        self,
+        aweme_id: str,
+        video: VideoRecord,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> Optional[dict]:
+        """获取视频信息，优先读缓存，未命中时请求分享页并写回缓存"""
+        if self.cache is not None:
+            cached = self.cache.get(aweme_id)
+            if cached is not None:
+                logger.info(f"解析缓存命中: {aweme_id}")
+                return cached
+
+        return self.inflight.do(
+            f"video:{aweme_id}", self._load_video_info, aweme_id, video, rate_limiter
+        )
+
+    def _load_video_info(
+        self, aweme_id: str, video: VideoRecord, rate_limiter: Optional[HostRateLimiter]
+    ) -> Optional[dict]:
+        """请求分享页并写入解析缓存"""
+        info = self._fetch_video_info(aweme_id, video, rate_limiter)
+
+        # 只缓存拿到播放地址的结果，失败的下次重新请求
+        if info and info.get("play_url") and self.cache is not None:
+            self.cache.set(aweme_id, info)
+        return info
+
+    def _fetch_video_info(
+        self,
+        aweme_id: str,
+        video: VideoRecord,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> Optional[dict]:
+        """请求 iesdouyin 分享页并提取视频信息
+
+        Returns:
+            包含 play_url、duration_seconds、title、author 的 dict，失败返回 None。
+            video 只用于日志输出，不会被修改。
+        """
+        try:
+            share_url = _SHARE_URL_TEMPLATE.format(aweme_id=aweme_id)
+            session = self._get_session()
+            if rate_limiter is not None:
+                rate_limiter.acquire(share_url)
+            # 流式读取：_ROUTER_DATA 脚本结束后立即停止，不下载页面剩余部分
+            with session.get(
+                share_url, headers=_HEADERS, timeout=self.timeout, stream=True
+            ) as resp:
+                if resp.status_code != 200:
+                    logger.warning(f"请求失败 HTTP {resp.status_code}: {video.title}")
+                    return None
+                chunks = resp.iter_content(chunk_size=_STREAM_CHUNK_SIZE)
+                router_data = read_router_data(chunks)
+                if router_data is not None:
+                    drain_response(chunks)
+
+            if router_data is None:
+                logger.warning(f"未找到 _ROUTER_DATA: {video.title}")
+                return None
+            return parse_router_data(router_data, video.title)
 
         except json.JSONDecodeError as e:
             logger.error(f"JSON 解析失败: {video.title} - {e}")
@@ -220,38 +536,76 @@ class VideoResolver:
         except Exception as e:
             logger.error(f"解析异常: {video.title} - {e}")
 
-        return video
+        return None
 
-    async def resolve_batch(self, videos: List[VideoRecord]) -> List[VideoRecord]:
-        """批量解析视频列表
+    async def resolve_stream(
+        self, videos: List[VideoRecord], concurrency: Optional[int] = None
+    ) -> AsyncIterator[VideoRecord]:
+        """并发解析视频列表，按完成顺序逐个产出结果
 
-        在事件循环中用 run_in_executor 执行同步请求，
-        每次请求之间加入延迟防止触发反爬。
-        返回解析后的 VideoRecord 列表（原地修改）。
+        最多 concurrency 个视频同时解析，所有请求共用按 host 限速的令牌桶，
+        对同一 host 的请求频率与逐个解析 + 固定 delay 间隔相同。
+        已有播放地址的视频直接产出，不发请求。
+
+        Args:
+            videos: 待解析的视频列表（原地修改）
+            concurrency: 并发数，为空则使用构造时的 concurrency；线程池按构造时的 concurrency 创建，
+                超出的部分不会增加并发，因此最大取构造时的值。
+                实际吞吐同时受每个 host 的限速（rate / burst）限制。
         """
-        loop = asyncio.get_event_loop()
-        resolved = []
-        total = len(videos)
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(min(concurrency or self.concurrency, self.concurrency))
+        executor = self._get_executor()
 
-        for i, video in enumerate(videos):
+        async def worker(video: VideoRecord) -> VideoRecord:
             # 跳过已解析的
             if video.video_play_url:
-                resolved.append(video)
-                continue
+                return video
+            async with semaphore:
+                return await loop.run_in_executor(
+                    executor, self.resolve, video, self._batch_limiter
+                )
 
-            result = await loop.run_in_executor(None, self.resolve, video)
-            resolved.append(result)
+        tasks = [asyncio.ensure_future(worker(v)) for v in videos]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前退出迭代时，取消尚未开始的任务
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def resolve_batch(
+        self, videos: List[VideoRecord], concurrency: Optional[int] = None
+    ) -> List[VideoRecord]:
+        """批量解析视频列表
 
-            # 除最后一个外，加延迟
-            if i < total - 1:
-                await asyncio.sleep(self.delay)
+        基于 resolve_stream 并发解析，全部完成后按输入顺序返回
+        解析后的 VideoRecord 列表（原地修改）。
+        """
+        async for _ in self.resolve_stream(videos, concurrency):
+            pass
 
-        success = sum(1 for v in resolved if v.video_play_url)
+        total = len(videos)
+        success = sum(1 for v in videos if v.video_play_url)
         logger.info(f"批量解析完成: {success}/{total} 个视频解析成功")
-        return resolved
+        return list(videos)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """批量解析使用的线程池（懒加载，大小与并发数一致）"""
+        with self._session_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="resolver"
+                )
+            return self._executor
 
     def close(self):
-        """关闭 HTTP Session"""
+        """关闭 HTTP Session 和批量解析线程池"""
         if self._session:
             self._session.close()
             self._session = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -8,23 +8,65 @@
 访问: http://localhost:8080
 """
 
+import asyncio
+import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from urllib.parse import quote
 
 import requests
-from flask import Flask, jsonify, request, Response
+from flask import Flask, jsonify, redirect, request, Response, send_file
 
-from video_resolver import VideoResolver, extract_url_from_text, resolve_short_url, extract_aweme_id
+from cache import TTLCache
+from http_client import configure as configure_http, get_session, parse_pool_sizes
+from video_resolver import VideoResolver, extract_url_from_text, resolve_short_url, extract_aweme_id, extract_input_url
 from models import VideoRecord
 from config import Config
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 app = Flask(__name__)
-resolver = VideoResolver(timeout=15.0)
+configure_http(
+    pool_size=Config.HTTP_POOL_SIZE,
+    retries=Config.HTTP_RETRIES,
+    host_pool_sizes=parse_pool_sizes(Config.HTTP_POOL_SIZES),
+)
+resolve_cache = TTLCache(
+    namespace="resolve",
+    ttl=Config.RESOLVE_CACHE_TTL,
+    max_size=Config.RESOLVE_CACHE_SIZE,
+    db_path=Config.CACHE_DB_PATH,
+)
+short_link_cache = TTLCache(
+    namespace="short_link",
+    ttl=Config.SHORT_LINK_CACHE_TTL,
+    max_size=Config.RESOLVE_CACHE_SIZE,
+    db_path=Config.CACHE_DB_PATH,
+)
+resolver = VideoResolver(
+    delay=Config.RESOLVE_DELAY,
+    timeout=15.0,
+    cache=resolve_cache,
+    short_link_cache=short_link_cache,
+    negative_ttl=Config.SHORT_LINK_NEGATIVE_TTL,
+    first_hop_only=Config.SHORT_LINK_FIRST_HOP,
+    concurrency=Config.RESOLVE_CONCURRENCY,
+    rate=Config.RESOLVE_RATE,
+    burst=Config.RESOLVE_BURST,
+)
 
 # 按需初始化转写器
 _transcriber = None
+transcript_cache = TTLCache(
+    namespace="transcript",
+    ttl=Config.TRANSCRIPT_CACHE_TTL,
+    max_size=Config.TRANSCRIPT_CACHE_SIZE,
+    db_path=Config.CACHE_DB_PATH,
+)
 
 def get_transcriber():
     global _transcriber
@@ -33,9 +75,163 @@ def get_transcriber():
         _transcriber = Transcriber(
             app_id=Config.VOLC_APP_ID,
             access_token=Config.VOLC_ACCESS_TOKEN,
+            cache=transcript_cache,
         )
     return _transcriber
 
+# 按需初始化后台任务队列
+_job_queue = None
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        from job_queue import JobQueue, JobStore
+        _job_queue = JobQueue(JobStore(Config.JOB_DB_PATH), workers=Config.JOB_WORKERS)
+        _job_queue.register("transcribe", _run_transcribe_job)
+    # 工作线程按进程启动，gunicorn fork 出的 worker 在首次使用时启动自己的线程
+    _job_queue.start()
+    return _job_queue
+
+# 按需初始化一站式处理队列（也执行批量解析）：与转写共用任务库，但使用独立的工作线程，
+# 流程中的转写在自己的线程内执行，不会和转写任务互相等待；失败不重试（阶段事件已推送给客户端）
+_pipeline_queue = None
+
+def get_pipeline_queue():
+    global _pipeline_queue
+    if _pipeline_queue is None:
+        from job_queue import JobQueue, JobStore
+        _pipeline_queue = JobQueue(
+            JobStore(Config.JOB_DB_PATH), workers=Config.PIPELINE_WORKERS, lease_seconds=600, max_attempts=1
+        )
+        _pipeline_queue.register("pipeline", _run_pipeline_job)
+        _pipeline_queue.register("resolve_batch", _run_resolve_batch_job)
+    _pipeline_queue.start()
+    return _pipeline_queue
+
+def _media_cache_budget():
+    """MEDIA_CACHE_MAX_MB 在视频缓存和音频缓存之间的分配 (video_mb, audio_mb)"""
+    if not Config.AUDIO_EXTRACT:
+        return Config.MEDIA_CACHE_MAX_MB, 0
+    audio_mb = min(Config.AUDIO_CACHE_MAX_MB, Config.MEDIA_CACHE_MAX_MB // 2)
+    return Config.MEDIA_CACHE_MAX_MB - audio_mb, audio_mb
+
+# 按需初始化视频磁盘缓存（MEDIA_CACHE_DIR 为空时不缓存）
+_media_cache = None
+
+def get_media_cache():
+    global _media_cache
+    if _media_cache is None and Config.MEDIA_CACHE_DIR:
+        from media_cache import MediaCache
+        _media_cache = MediaCache(Config.MEDIA_CACHE_DIR, max_bytes=_media_cache_budget()[0] << 20)
+    return _media_cache
+
+# 按需初始化音频抽取（需要视频缓存目录和 ffmpeg）
+_audio_extractor = None
+
+def get_audio_extractor():
+    """返回可用的音频抽取器，未启用或找不到 ffmpeg 时返回 None"""
+    global _audio_extractor
+    if _audio_extractor is None and Config.AUDIO_EXTRACT and Config.MEDIA_CACHE_DIR:
+        from audio_extractor import AudioExtractor
+        from media_cache import MediaCache
+        _audio_extractor = AudioExtractor(
+            MediaCache(
+                os.path.join(Config.MEDIA_CACHE_DIR, "audio"),
+                max_bytes=_media_cache_budget()[1] << 20,
+                suffix=".m4a",
+            ),
+            video_cache=get_media_cache(),
+            ffmpeg=Config.FFMPEG_PATH,
+        )
+    if _audio_extractor is not None and _audio_extractor.available:
+        return _audio_extractor
+    return None
+
+
+# /api/audio 未命中缓存时在后台抽取音轨
+_audio_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="audio")
+
+# 请求抖音 CDN 视频时使用的请求头（绕过 Referer 防盗链）
+_DOWNLOAD_HEADERS = {
+    "user-agent": "Mozilla/5.0 (Linux; Android 8.0.0) AppleWebKit/537.36 Chrome/116.0.0.0 Mobile Safari/537.36",
+    "referer": "https://www.douyin.com/",
+}
+
+
+def _proxy_url(endpoint: str, play_url: str) -> str:
+    """本服务的代理地址（火山引擎通过该地址回源下载）"""
+    from transcriber import proxy_url
+
+    return proxy_url(Config.PROXY_BASE_URL, endpoint, play_url)
+
+
+def _extract_audio(play_url: str):
+    """抽取视频的音轨，优先使用已缓存的视频文件，返回 m4a 路径；不可用、失败或不是抖音地址返回 None"""
+    extractor = get_audio_extractor()
+    if extractor is None:
+        return None
+    from transcriber import media_fingerprint
+
+    return extractor.extract(media_fingerprint(play_url), play_url, headers=_DOWNLOAD_HEADERS)
+
+
+def _run_transcribe_job(payload: dict) -> dict:
+    """后台转写任务"""
+    transcriber = get_transcriber()
+    if not transcriber:
+        raise RuntimeError("转写功能未配置")
+    audio_url = payload["audio_url"]
+    if payload.get("play_url") and "/api/audio?" in audio_url:
+        # 先在本地抽好音频，火山引擎回源时直接命中缓存；抽取失败退回完整视频
+        if _extract_audio(payload["play_url"]) is None:
+            audio_url = _proxy_url("/api/download", payload["play_url"])
+    result = transcriber.transcribe(audio_url, cache_key=payload.get("cache_key"))
+    if result.error:
+        raise RuntimeError(result.error)
+    return _transcript_payload(result)
+
+
+def _transcript_payload(result) -> dict:
+    """转写结果 → 接口返回数据
+
+    utterances 只保留文字和起止时间，供 AI 纠错按分句边界分段。
+    """
+    return {
+        "text": result.text,
+        "duration": round(result.duration, 1),
+        "utterance_count": len(result.utterances),
+        "utterances": [
+            {"text": u.get("text", ""), "start_time": u.get("start_time"), "end_time": u.get("end_time")}
+            for u in result.utterances
+        ],
+    }
+
+
+def _start_transcription(play_url: str):
+    """开始转写：有缓存直接返回结果，否则提交后台任务
+
+    Returns:
+        (job, cached)：命中缓存时 job 为 None、cached 为结果数据；否则 cached 为 None
+    """
+    payload = _transcribe_job_payload(play_url)
+    cached = get_transcriber().get_cached(payload["cache_key"])
+    if cached is not None:
+        return None, dict(_transcript_payload(cached), cached=True)
+    job = get_job_queue().submit("transcribe", payload)
+    return job, None
+
+
+def _transcribe_job_payload(play_url: str) -> dict:
+    """转写任务参数：提交给火山引擎的代理地址和缓存键"""
+    from transcriber import media_fingerprint
+
+    # 使用本地代理地址，绕过抖音防盗链
+    # 火山引擎会通过我们的服务器下载视频；可以抽取音频时只让它下载音轨
+    endpoint = "/api/audio" if get_audio_extractor() else "/api/download"
+    proxy_url = _proxy_url(endpoint, play_url)
+    logging.info(f"使用代理地址进行转写: {proxy_url}")
+    return {"audio_url": proxy_url, "play_url": play_url, "cache_key": media_fingerprint(play_url)}
+
 # 按需初始化飞书客户端
 _feishu_client = None
 
@@ -60,6 +256,15 @@ def get_ai_processor():
         _ai_processor = AIProcessor(
             api_key=Config.ARK_API_KEY,
             model=Config.ARK_MODEL,
+            cache=TTLCache(
+                namespace="ai",
+                ttl=Config.AI_CACHE_TTL,
+                max_size=Config.AI_CACHE_SIZE,
+                db_path=Config.CACHE_DB_PATH,
+            ),
+            chunk_chars=Config.AI_CHUNK_CHARS,
+            concurrency=Config.AI_CONCURRENCY,
+            summary_from_raw=Config.AI_SUMMARY_FROM_RAW,
         )
     return _ai_processor
 
@@ -78,6 +283,57 @@ def get_email_sender():
         )
     return _email_sender
 
+# 按需初始化发件队列：与转写共用任务库，但使用独立的工作线程，
+# 邮件不会排在长时间的转写任务后面；单个线程发送，复用同一个 SMTP 连接
+_email_outbox = None
+
+def get_email_outbox():
+    global _email_outbox
+    if _email_outbox is None:
+        from job_queue import JobQueue, JobStore
+        # 失败后 30s、60s 再重试，临时的 SMTP 故障不会在一秒内耗尽重试次数
+        _email_outbox = JobQueue(
+            JobStore(Config.JOB_DB_PATH), workers=1, lease_seconds=300, max_attempts=3, retry_backoff=30
+        )
+        _email_outbox.register("send_email", _run_email_job)
+    _email_outbox.start()
+    return _email_outbox
+
+
+def _run_email_job(payload: dict) -> dict:
+    """后台发送邮件任务：AI 纠错 + 摘要后发送
+
+    发送成功后立即记录 sent 事件；任务因结果写入失败、租约过期等原因再次执行时，
+    已发送过的邮件直接返回记录的结果，不会重复发送。
+    """
+    outbox = get_email_outbox()
+    job = outbox.current_job()
+    if job is not None:
+        sent = [e for e in outbox.store.events(job.id) if e["event"] == "sent"]
+        if sent:
+            logging.info(f"邮件已发送过，跳过: job_id={job.id}")
+            return sent[-1]["data"]
+
+    sender = get_email_sender()
+    if not sender:
+        raise RuntimeError("邮件功能未配置")
+    data = payload["data"]
+    final_text, summary, title = _prepare_content(data, payload["text"])
+    result = sender.send_transcript(
+        to_addr=payload["to"],
+        title=title,
+        author=data.get("author", ""),
+        source_url=data.get("source_url", ""),
+        duration=data.get("duration", 0),
+        text=final_text,
+        summary=summary,
+    )
+    if not result.success:
+        raise RuntimeError(result.error)
+    sent = {"to": payload["to"], "title": title}
+    outbox.emit("sent", sent)
+    return sent
+
 
 HTML_PAGE = """<!DOCTYPE html>
 <html lang="zh-CN">
@@ -245,6 +501,9 @@ let lastTitle = '';
 let lastAuthor = '';
 let lastDuration = 0;
 let lastSourceUrl = '';
+let lastSummary = '';
+let lastAiProcessed = false;
+let aiEnabled = AI_ENABLED;
 let transcribeEnabled = TRANSCRIBE_ENABLED;
 let feishuEnabled = FEISHU_ENABLED;
 let emailEnabled = EMAIL_ENABLED;
@@ -308,63 +567,83 @@ async function parse() {
   } finally { btn.disabled = false; btn.textContent = '解析视频'; }
 }
 
-async function transcribe() {
-  if (!lastPlayUrl) return;
+function transcribe() {
+  if (!lastSourceUrl) return;
   const btn = document.getElementById('transcribeBtn');
   const tBox = document.getElementById('transcriptBox');
   const tText = document.getElementById('transcriptText');
   btn.disabled = true;
   btn.innerHTML = '<span class="spinner"></span>转写中，请稍候...';
-  try {
-    const ctrl = new AbortController();
-    const timer = setTimeout(()=>ctrl.abort(), 180000);
-    const resp = await fetch('/api/transcribe', {
-      method: 'POST', headers: {'Content-Type':'application/json'},
-      body: JSON.stringify({url: lastPlayUrl}), signal: ctrl.signal
-    });
-    clearTimeout(timer);
-    const data = await resp.json();
-    if (data.success) {
-      tText.textContent = data.text;
-      tBox.className = 'transcript-box show';
-      btn.textContent = '✅ 转写完成';
-      btn.disabled = true;
-      // 操作按钮区域
-      let actionsDiv = document.getElementById('actionBtns');
-      if (!actionsDiv) {
-        actionsDiv = document.createElement('div');
-        actionsDiv.id = 'actionBtns';
-        actionsDiv.className = 'action-btns';
-        tBox.appendChild(actionsDiv);
-      }
-      actionsDiv.innerHTML = '';
-      if (feishuEnabled) {
-        const saveBtn = document.createElement('button');
-        saveBtn.id = 'saveFeishuBtn';
-        saveBtn.className = 'btn btn-secondary';
-        saveBtn.textContent = '📝 AI润色并存入飞书';
-        saveBtn.onclick = saveToFeishu;
-        actionsDiv.appendChild(saveBtn);
-      }
-      if (emailEnabled) {
-        const emailBtn = document.createElement('button');
-        emailBtn.id = 'sendEmailBtn';
-        emailBtn.className = 'btn btn-secondary';
-        emailBtn.textContent = '📧 AI润色并发送邮件';
-        emailBtn.onclick = showEmailInput;
-        actionsDiv.appendChild(emailBtn);
-      }
-    } else {
-      btn.textContent = '❌ 转写失败';
-      btn.disabled = false;
-      alert('转写失败: ' + data.error);
+  lastSummary = '';
+  lastAiProcessed = false;
+  // 需要保存/发送时顺带做 AI 纠错和摘要，后续保存不再重复调用大模型
+  const useAi = aiEnabled && (feishuEnabled || emailEnabled);
+  const es = new EventSource('/api/pipeline?url=' + encodeURIComponent(lastSourceUrl) + (useAi ? '&ai=1' : ''));
+  const stage = (text) => { btn.innerHTML = '<span class="spinner"></span>' + text; };
+  let finished = false;
+  const on = (name, fn) => es.addEventListener(name, (e) => fn(JSON.parse(e.data)));
+  on('submitted', () => stage('转写中，请稍候...'));
+  on('transcribed', (d) => {
+    tText.textContent = d.text;
+    tBox.className = 'transcript-box show';
+    if (useAi) stage('AI 润色中...');
+  });
+  let correcting = false;
+  on('correcting', (d) => {
+    if (!correcting) { correcting = true; tText.textContent = ''; }
+    tText.textContent += d.delta;
+  });
+  on('corrected', (d) => { tText.textContent = d.text; stage('生成摘要中...'); });
+  on('summarized', (d) => { lastSummary = d.summary; });
+  on('done', (d) => {
+    finished = true;
+    es.close();
+    tText.textContent = d.text;
+    tBox.className = 'transcript-box show';
+    lastAiProcessed = d.ai_processed;
+    btn.textContent = '✅ 转写完成';
+    btn.disabled = true;
+    // 操作按钮区域
+    let actionsDiv = document.getElementById('actionBtns');
+    if (!actionsDiv) {
+      actionsDiv = document.createElement('div');
+      actionsDiv.id = 'actionBtns';
+      actionsDiv.className = 'action-btns';
+      tBox.appendChild(actionsDiv);
     }
-  } catch(e) {
-    const msg = e.name==='AbortError' ? '转写超时' : '请求失败: '+e.message;
+    actionsDiv.innerHTML = '';
+    if (feishuEnabled) {
+      const saveBtn = document.createElement('button');
+      saveBtn.id = 'saveFeishuBtn';
+      saveBtn.className = 'btn btn-secondary';
+      saveBtn.textContent = '📝 AI润色并存入飞书';
+      saveBtn.onclick = saveToFeishu;
+      actionsDiv.appendChild(saveBtn);
+    }
+    if (emailEnabled) {
+      const emailBtn = document.createElement('button');
+      emailBtn.id = 'sendEmailBtn';
+      emailBtn.className = 'btn btn-secondary';
+      emailBtn.textContent = '📧 AI润色并发送邮件';
+      emailBtn.onclick = showEmailInput;
+      actionsDiv.appendChild(emailBtn);
+    }
+  });
+  on('failed', (d) => {
+    finished = true;
+    es.close();
+    btn.textContent = '❌ 转写失败';
+    btn.disabled = false;
+    alert('转写失败: ' + d.error);
+  });
+  // 服务端每隔一段时间结束响应，EventSource 带上 Last-Event-ID 自动重连并继续推送；
+  // 只有重连也失败（连接已关闭）时才提示
+  es.onerror = () => {
+    if (finished || es.readyState !== EventSource.CLOSED) return;
     btn.textContent = '🎤 语音转文字';
     btn.disabled = false;
-    alert(msg);
-  }
+    alert('连接中断，请重试');
+  };
 }
 
 function copyUrl(btn) {
@@ -406,7 +685,8 @@ async function saveToFeishu() {
   try {
     const resp = await fetch('/api/save_feishu', {
       method: 'POST', headers: {'Content-Type':'application/json'},
-      body: JSON.stringify({title: lastTitle, author: lastAuthor, source_url: lastSourceUrl, duration: lastDuration, text: text}),
+      body: JSON.stringify({title: lastTitle, author: lastAuthor, source_url: lastSourceUrl, duration: lastDuration, text: text,
+        summary: lastSummary, ai_processed: lastAiProcessed}),
       signal: AbortSignal.timeout(90000)
     });
     const data = await resp.json();
@@ -451,13 +731,15 @@ async function sendEmail() {
   try {
     const resp = await fetch('/api/send_email', {
       method: 'POST', headers: {'Content-Type':'application/json'},
-      body: JSON.stringify({title: lastTitle, author: lastAuthor, source_url: lastSourceUrl, duration: lastDuration, text: text, to: emailTo}),
+      body: JSON.stringify({title: lastTitle, author: lastAuthor, source_url: lastSourceUrl, duration: lastDuration, text: text, to: emailTo,
+        summary: lastSummary, ai_processed: lastAiProcessed}),
       signal: AbortSignal.timeout(90000)
     });
     const data = await resp.json();
     if (data.success) {
-      btn.innerHTML = '✅ 已发送';
+      btn.innerHTML = '✅ 已加入发送队列';
       btn.disabled = true;
+      waitEmailJob(data.job_id, btn);
     } else {
       btn.textContent = '发送'; btn.disabled = false;
       alert('发送失败: ' + data.error);
@@ -468,6 +750,22 @@ async function sendEmail() {
   }
 }
 
+// 邮件在后台发送，轮询任务状态更新按钮
+async function waitEmailJob(jobId, btn) {
+  for (let i = 0; i < 90; i++) {
+    await new Promise(r => setTimeout(r, 2000));
+    try {
+      const data = await (await fetch('/api/jobs/' + jobId)).json();
+      if (data.status === 'done') { btn.innerHTML = '✅ 已发送'; return; }
+      if (data.status === 'failed') {
+        btn.textContent = '发送'; btn.disabled = false;
+        alert('发送失败: ' + data.error);
+        return;
+      }
+    } catch(e) {}
+  }
+}
+
 function esc(s){const d=document.createElement('div');d.textContent=s;return d.innerHTML;}
 document.getElementById('input').addEventListener('keydown',(e)=>{
   if((e.ctrlKey||e.metaKey)&&e.key==='Enter') parse();
@@ -483,11 +781,13 @@ def index():
     enabled = "true" if Config.is_transcribe_enabled() else "false"
     feishu = "true" if Config.is_feishu_enabled() else "false"
     email = "true" if Config.is_email_enabled() else "false"
+    ai = "true" if Config.is_ai_enabled() else "false"
     email_to = Config.EMAIL_TO or ""
     page = (HTML_PAGE
         .replace("TRANSCRIBE_ENABLED", enabled)
         .replace("FEISHU_ENABLED", feishu)
         .replace("EMAIL_ENABLED", email)
+        .replace("AI_ENABLED", ai)
         .replace("DEFAULT_EMAIL_TO", email_to))
     return page
 
@@ -500,22 +800,139 @@ def api_resolve():
         return jsonify({"success": False, "error": "请输入链接或分享文本"})
     video = VideoRecord(title="", url=raw_input)
     result = resolver.resolve(video)
+    return jsonify(_resolve_payload(result))
+
+
+def _resolve_payload(result: VideoRecord) -> dict:
+    """解析结果 → 接口返回数据"""
     if result.video_play_url:
-        return jsonify({
+        return {
             "success": True,
             "aweme_id": result.aweme_id,
             "play_url": result.video_play_url,
             "duration": round(result.duration_seconds, 1),
             "title": result.title or "",
             "author": result.author or "",
-        })
-    else:
-        return jsonify({"success": False, "error": "解析失败，请检查链接是否有效"})
+        }
+    return {"success": False, "error": "解析失败，请检查链接是否有效"}
+
+
+def _iter_async(agen):
+    """在独立的事件循环中同步迭代异步生成器，供 Flask 流式响应使用"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.close()
+
+
+@app.route("/api/resolve_batch", methods=["POST"])
+def api_resolve_batch():
+    """批量解析，NDJSON 流式返回
+
+    请求体：{"urls": ["分享文本或链接", ...]}，也可以是按行分隔的字符串。
+    解析在后台任务中执行，第一行为 {"job_id": ..., "total": 输入数}；之后每解析完一个视频输出一行 JSON
+    （按完成顺序，用 index 对应输入位置）。同一批次中重复的链接只解析一次，结果按各自的 index 分别输出。
+
+    响应最长保持 _SSE_WINDOW 秒；届时还没解析完时最后一行为 {"job_id": ..., "pending": true, "after": 序号}，
+    剩余结果通过 /api/jobs/<job_id>?after=序号 轮询获取（events 中的 data 即结果行）。
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get("urls", [])
+    if isinstance(urls, str):
+        urls = urls.splitlines()
+    if not isinstance(urls, list):
+        return jsonify({"success": False, "error": "urls 必须是列表"})
+    inputs = [str(u).strip() for u in urls if str(u).strip()]
+    if not inputs:
+        return jsonify({"success": False, "error": "请输入链接或分享文本"})
+    if len(inputs) > Config.RESOLVE_BATCH_MAX:
+        return jsonify({"success": False, "error": f"单次最多解析 {Config.RESOLVE_BATCH_MAX} 个链接"})
+
+    job = get_pipeline_queue().submit("resolve_batch", {"inputs": inputs})
+    return Response(
+        _stream_batch_results(job.id, len(inputs)),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
+
+
+def _run_resolve_batch_job(payload: dict) -> dict:
+    """后台批量解析任务：每个结果记录为一条 result 事件"""
+    emit = get_pipeline_queue().emit
+    inputs = payload["inputs"]
+
+    # 按规整后的链接去重，记录每个唯一链接对应的输入位置
+    videos = []
+    indexes = {}
+    seen = {}
+    for i, raw in enumerate(inputs):
+        key = extract_input_url(raw) or raw
+        if key not in seen:
+            video = VideoRecord(title="", url=raw)
+            seen[key] = video
+            videos.append(video)
+            indexes[id(video)] = []
+        indexes[id(seen[key])].append(i)
+
+    logging.info(f"批量解析: {len(inputs)} 个输入, 去重后 {len(videos)} 个")
+
+    for video in _iter_async(resolver.resolve_stream(videos)):
+        result = _resolve_payload(video)
+        for i in indexes[id(video)]:
+            emit("result", dict(result, index=i, input=inputs[i]))
+    return {"total": len(inputs), "success": sum(1 for v in videos if v.video_play_url)}
+
+
+def _stream_batch_results(job_id: str, total: int):
+    """从任务库读取批量解析结果并逐行输出，解析完成或超过 _SSE_WINDOW 秒后结束"""
+    queue = get_pipeline_queue()
+    deadline = time.monotonic() + _SSE_WINDOW
+    after = 0
+    yield json.dumps({"job_id": job_id, "total": total}) + "\n"
+    while True:
+        job = queue.get(job_id)
+        for item in queue.store.events(job_id, after):
+            after = item["seq"]
+            yield json.dumps(item["data"], ensure_ascii=False) + "\n"
+        if job is None or job.status == "failed":
+            error = (job.error if job else None) or "任务不存在"
+            yield json.dumps({"job_id": job_id, "error": error}, ensure_ascii=False) + "\n"
+            return
+        if job.status == "done":
+            return
+        if time.monotonic() >= deadline:
+            yield json.dumps({"job_id": job_id, "pending": True, "after": after}) + "\n"
+            return
+        time.sleep(_SSE_POLL_INTERVAL)
+
+
+@app.route("/api/cache_stats")
+def api_cache_stats():
+    """缓存命中统计"""
+    return jsonify({
+        "resolve": resolve_cache.stats(),
+        "short_link": short_link_cache.stats(),
+        "singleflight": resolver.inflight.stats(),
+        "transcript": transcript_cache.stats(),
+        "ai": get_ai_processor().stats() if get_ai_processor() else None,
+        "media": get_media_cache().stats() if get_media_cache() else None,
+        "audio": get_audio_extractor().stats() if get_audio_extractor() else None,
+    })
 
 
 @app.route("/api/transcribe", methods=["POST"])
 def api_transcribe():
-    """语音转文字接口"""
+    """语音转文字接口
+
+    提交后台转写任务，立即返回 job_id，通过 /api/jobs/<job_id> 查询结果。
+    同一视频已转写过时直接返回 status=done 和 result，不再提交任务。
+    """
     transcriber = get_transcriber()
     if not transcriber:
         return jsonify({"success": False, "error": "转写功能未配置，请设置 VOLC_APP_ID 和 VOLC_ACCESS_TOKEN"})
@@ -525,26 +942,303 @@ def api_transcribe():
     if not audio_url:
         return jsonify({"success": False, "error": "请提供音频 URL"})
 
-    # 使用本地代理地址，绕过抖音防盗链
-    # 火山引擎会通过我们的服务器下载视频
-    proxy_url = f"http://127.0.0.1:3101/api/download?url={audio_url}"
-    logging.info(f"使用代理地址进行转写: {proxy_url}")
-    
-    result = transcriber.transcribe(proxy_url)
-    if result.error:
-        return jsonify({"success": False, "error": result.error})
+    job, cached = _start_transcription(audio_url)
+    if cached is not None:
+        return jsonify({"success": True, "job_id": None, "status": "done", "result": cached})
+    return jsonify({"success": True, "job_id": job.id, "status": job.status})
 
-    return jsonify({
+
+@app.route("/api/jobs/<job_id>")
+def api_job_status(job_id):
+    """查询后台任务状态
+
+    带 after 参数时同时返回序号大于 after 的阶段事件（如 /api/pipeline 的事件），用于轮询。
+    """
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "任务不存在"}), 404
+    data = {
         "success": True,
-        "text": result.text,
-        "duration": round(result.duration, 1),
-        "utterance_count": len(result.utterances),
-    })
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+    }
+    after = request.args.get("after", "")
+    if after.isdigit():
+        data["events"] = queue.store.events(job_id, int(after))
+    return jsonify(data)
+
+
+@app.route("/api/correct_stream", methods=["POST"])
+def api_correct_stream():
+    """AI 流式纠错，NDJSON 流式返回
 
+    请求体：{"text": "转写文字", "utterances": [...]}（utterances 可选，用于长文本分段）
+    每收到一段生成的文字输出一行 {"delta": "..."}，结束时输出 {"done": true, "text": 完整文字}，
+    中途失败输出 {"error": "..."}。
+    """
+    ai = get_ai_processor()
+    if not ai:
+        return jsonify({"success": False, "error": "AI 功能未配置"})
+
+    data = request.get_json(silent=True) or {}
+    text = data.get("text", "").strip()
+    if not text:
+        return jsonify({"success": False, "error": "没有可处理的文字内容"})
+    utterances = data.get("utterances") if isinstance(data.get("utterances"), list) else None
+
+    def generate():
+        parts = []
+        try:
+            for delta in ai.correct_stream(text, utterances):
+                parts.append(delta)
+                yield json.dumps({"delta": delta}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logging.warning(f"AI 流式纠错失败: {e}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+            return
+        yield json.dumps({"done": True, "text": "".join(parts).strip()}, ensure_ascii=False) + "\n"
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
+
+
+# 摘要与流式纠错并行时使用的线程池
+_pipeline_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pipeline")
+
+# 单次 SSE / NDJSON 流式响应最长保持的时间（秒），远小于 gunicorn --timeout；响应结束后浏览器 EventSource
+# 带上 Last-Event-ID 自动重连，从下一条事件继续（批量解析则改为轮询），长时间的任务不会一直占用 worker
+_SSE_WINDOW = 25
+_SSE_POLL_INTERVAL = 0.5
+_SSE_TERMINAL_EVENTS = ("done", "failed")
+# 流式纠错的文字增量每隔该时间（秒）合并写入一条 correcting 事件，避免每个 token 写一次任务库
+_DELTA_FLUSH_INTERVAL = 0.5
+
+
+def _sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """格式化一条 SSE 事件"""
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class _PipelineFailed(Exception):
+    """一站式处理在某个阶段失败（failed 事件已记录）"""
+
+
+def _run_pipeline_job(payload: dict) -> dict:
+    """后台一站式处理任务：解析 → 转写 → AI 纠错/摘要 → 保存
+
+    各阶段结果通过 emit 记录为任务事件，由 /api/pipeline 从任务库读取后推送给客户端。
+    转写在当前线程内直接执行，不再提交转写任务等待，避免与转写队列互相占用工作线程。
+    """
+    emit = get_pipeline_queue().emit
+    raw_input = payload["url"]
+    save = payload.get("save", "")
+    to_addr = payload.get("to", "")
+
+    def fail(stage: str, error: str):
+        emit("failed", {"stage": stage, "error": error})
+        raise _PipelineFailed(f"{stage}: {error}")
+
+    # 1. 解析
+    video = resolver.resolve(VideoRecord(title="", url=raw_input))
+    resolved = _resolve_payload(video)
+    if not resolved["success"]:
+        fail("resolve", resolved["error"])
+    emit("resolved", resolved)
+
+    # 2. 转写
+    transcriber = get_transcriber()
+    if not transcriber:
+        fail("transcribe", "转写功能未配置")
+    job_payload = _transcribe_job_payload(video.video_play_url)
+    cached = transcriber.get_cached(job_payload["cache_key"])
+    if cached is not None:
+        transcript = dict(_transcript_payload(cached), cached=True)
+    else:
+        emit("submitted", {})
+        try:
+            transcript = _run_transcribe_job(job_payload)
+        except Exception as e:
+            fail("transcribe", str(e))
+    text = transcript["text"]
+    emit("transcribed", transcript)
+
+    # 3. AI 纠错 + 摘要（失败时保留原文继续）
+    summary = ""
+    ai_processed = False
+    ai = get_ai_processor() if payload.get("ai") else None
+    if ai:
+        try:
+            # 摘要基于原文时与纠错同时进行
+            summary_future = (
+                _pipeline_executor.submit(ai.summarize, text) if ai.summary_from_raw else None
+            )
+            # 流式纠错：边生成边记录 correcting 事件
+            parts, pending = [], []
+            flushed_at = time.monotonic()
+            for delta in ai.correct_stream(text, transcript.get("utterances")):
+                parts.append(delta)
+                pending.append(delta)
+                if time.monotonic() - flushed_at >= _DELTA_FLUSH_INTERVAL:
+                    emit("correcting", {"delta": "".join(pending)})
+                    pending = []
+                    flushed_at = time.monotonic()
+            if pending:
+                emit("correcting", {"delta": "".join(pending)})
+            text = "".join(parts).strip()
+            emit("corrected", {"text": text})
+            summary = summary_future.result() if summary_future is not None else ai.summarize(text)
+            emit("summarized", {"summary": summary})
+            ai_processed = True
+        except Exception as e:
+            logging.warning(f"AI 处理失败，使用原始文字: {e}")
+
+    # 4. 保存
+    if save:
+        content = {
+            "title": video.title,
+            "summary": summary,
+            "ai_processed": ai_processed,
+        }
+        final_text, summary, title = _prepare_content(content, text)
+        common = dict(
+            title=title,
+            author=video.author,
+            source_url=raw_input,
+            duration=round(video.duration_seconds, 1),
+            text=final_text,
+            summary=summary,
+        )
+        if save == "feishu" and get_feishu_client():
+            result = get_feishu_client().save_transcript(**common)
+            if not result.success:
+                fail("save", result.error)
+            emit("saved", {"target": "feishu", "doc_url": result.doc_url, "doc_title": result.doc_title})
+        elif save == "email" and get_email_sender() and to_addr:
+            # 与 /api/send_email 走同一个发件队列（失败退避重试）；内容已处理好，发件时不再调用大模型
+            data = {k: v for k, v in common.items() if k != "text"}
+            job = get_email_outbox().submit("send_email", {
+                "to": to_addr,
+                "text": final_text,
+                "data": dict(data, ai_processed=True),
+            })
+            emit("saved", {"target": "email", "to": to_addr, "job_id": job.id, "queued": True})
+        else:
+            fail("save", f"保存目标不可用: {save}")
 
-@app.route("/api/download")
+    done = {
+        "title": video.title,
+        "text": text,
+        "summary": summary,
+        "ai_processed": ai_processed,
+    }
+    emit("done", done)
+    return done
+
+
+def _stream_job_events(job_id: str, after: int):
+    """从任务库读取 after 之后的事件并以 SSE 推送
+
+    推送到 done / failed 事件，或超过 _SSE_WINDOW 秒后结束本次响应（客户端重连后继续）。
+    """
+    queue = get_pipeline_queue()
+    deadline = time.monotonic() + _SSE_WINDOW
+    yield "retry: 1000\n\n"
+    # 先推送一条带 id 的事件：即使本次窗口内没有新事件，重连时也能带上 Last-Event-ID
+    yield _sse("queued", {"job_id": job_id}, f"{job_id}:{after}")
+    while True:
+        # 先读状态再读事件：任务结束前写入的事件一定能在本轮读到
+        job = queue.get(job_id)
+        for item in queue.store.events(job_id, after):
+            after = item["seq"]
+            yield _sse(item["event"], item["data"], f"{job_id}:{after}")
+            if item["event"] in _SSE_TERMINAL_EVENTS:
+                return
+        if job is None or job.status in ("done", "failed"):
+            # 没有记录结束事件就结束的任务（如进程退出后租约过期）
+            error = (job.error if job else None) or "任务不存在或已中断"
+            yield _sse("failed", {"stage": "job", "error": error}, f"{job_id}:{after}")
+            return
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(_SSE_POLL_INTERVAL)
+
+
+@app.route("/api/pipeline")
+def api_pipeline():
+    """一站式处理：解析 → 转写 → AI 纠错/摘要 → 保存，通过 SSE 推送各阶段结果
+
+    处理在后台任务中执行，本接口只推送任务库中记录的事件；每次响应最长 _SSE_WINDOW 秒，
+    EventSource 重连时根据 Last-Event-ID（"job_id:序号"）继续推送，不会重新执行流程。
+
+    参数（query string，便于浏览器 EventSource 直接使用）：
+        url: 分享文本或链接
+        ai: 1 时进行 AI 纠错和摘要
+        save: feishu / email，处理完成后保存到飞书或发送邮件（会自动进行 AI 处理）
+        to: save=email 时的收件人，默认 ALERT_EMAIL_TO
+        job_id: 继续推送已有任务的事件（不使用 EventSource 时）
+
+    事件：queued（job_id）、resolved、submitted、transcribed、correcting（纠错文字增量）、corrected、
+    summarized、saved、done；任一阶段失败推送 failed 事件后结束。
+    事件也可以通过 /api/jobs/<job_id>?after=序号 轮询获取。
+    """
+    resume = request.args.get("job_id", "").strip() or request.headers.get("Last-Event-ID", "").strip()
+    if resume:
+        job_id, _, seq = resume.partition(":")
+        after = int(seq) if seq.isdigit() else 0
+    else:
+        raw_input = request.args.get("url", "").strip()
+        if not raw_input:
+            return Response(
+                _sse("failed", {"stage": "input", "error": "请输入链接或分享文本"}),
+                mimetype="text/event-stream",
+            )
+        save = request.args.get("save", "").strip()
+        job = get_pipeline_queue().submit("pipeline", {
+            "url": raw_input,
+            "save": save,
+            "ai": request.args.get("ai", "") in ("1", "true") or bool(save),
+            "to": request.args.get("to", "").strip() or Config.EMAIL_TO,
+        })
+        job_id, after = job.id, 0
+
+    return Response(
+        _stream_job_events(job_id, after),
+        mimetype="text/event-stream",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
+
+
+# 透传给上游 / 回传给客户端的断点续传相关头
+_RANGE_REQUEST_HEADERS = ("Range", "If-Range")
+_RANGE_RESPONSE_HEADERS = ("Content-Range", "Accept-Ranges", "ETag", "Last-Modified")
+
+
+def _iter_upstream(upstream):
+    """逐块转发上游响应体，结束或客户端断开时释放连接"""
+    try:
+        yield from upstream.iter_content(chunk_size=65536)
+    finally:
+        upstream.close()
+
+
+@app.route("/api/download", methods=["GET", "HEAD"])
 def api_download():
-    """代理下载视频（绕过抖音 Referer 防盗链）"""
+    """代理下载视频（绕过抖音 Referer 防盗链）
+
+    透传 Range / If-Range，上游返回 206 时原样返回部分内容，支持播放器拖动和断点续传；
+    HEAD 请求只返回响应头，不下载视频内容。
+
+    启用磁盘缓存时，已缓存的视频直接从本地文件返回（支持 Range）；
+    未缓存时在后台下载写入缓存，同一视频的并发请求共享这一次下载。
+    """
     video_url = request.args.get("url", "").strip()
     title = request.args.get("title", "video").strip() or "video"
     if not video_url:
@@ -558,12 +1252,73 @@ def api_download():
     encoded_title = quote(safe_title)
 
     try:
-        headers = {
-            "user-agent": "Mozilla/5.0 (Linux; Android 8.0.0) AppleWebKit/537.36 Chrome/116.0.0.0 Mobile Safari/537.36",
-            "referer": "https://www.douyin.com/",
-        }
-        upstream = requests.get(video_url, headers=headers, stream=True, timeout=30, allow_redirects=True)
-        if upstream.status_code != 200:
+        headers = dict(_DOWNLOAD_HEADERS)
+        session = get_session()
+
+        media_cache = get_media_cache()
+        if media_cache is not None:
+            from transcriber import media_fingerprint
+
+            # media_fingerprint 只对抖音播放域名采用 video_id，其他地址按完整 URL 区分，
+            # 任意地址无法冒用已缓存视频的键
+            key = media_fingerprint(video_url)
+            path = media_cache.lookup(key)
+            if path:
+                return send_file(
+                    path,
+                    mimetype="video/mp4",
+                    as_attachment=True,
+                    download_name=f"{safe_title}.mp4",
+                    conditional=True,
+                )
+            if request.method == "GET":
+                fetch_headers = dict(headers)
+                try:
+                    download, reader = media_cache.fetch(
+                        key,
+                        lambda: session.get(
+                            video_url, headers=fetch_headers, stream=True, timeout=30, allow_redirects=True
+                        ),
+                    )
+                except OSError as e:
+                    # 缓存目录不可写等本地错误：跳过缓存，直接转发上游
+                    logging.warning(f"视频缓存不可用，直接转发: {e}")
+                    reader = None
+                if reader is not None:
+                    if request.headers.get("Range"):
+                        # 缓存在后台继续下载，本次 Range 请求直接转发上游
+                        reader.close()
+                    elif download.wait_ready(timeout=30):
+                        resp_headers = {
+                            "Content-Type": download.content_type,
+                            "Content-Disposition": f'attachment; filename="{encoded_title}.mp4"; filename*=UTF-8\'\'{encoded_title}.mp4',
+                        }
+                        if download.total is not None:
+                            resp_headers["Content-Length"] = str(download.total)
+                        return Response(download.iter_bytes(reader), headers=resp_headers)
+                    else:
+                        reader.close()
+                        return jsonify({"success": False, "error": download.error or "上游响应超时"}), 502
+
+        for name in _RANGE_REQUEST_HEADERS:
+            if request.headers.get(name):
+                headers[name] = request.headers[name]
+
+        if request.method == "HEAD":
+            upstream = session.head(video_url, headers=headers, timeout=30, allow_redirects=True)
+            if upstream.status_code == 405:
+                # 上游不支持 HEAD 时用 GET 取响应头，不读取内容
+                upstream = session.get(video_url, headers=headers, stream=True, timeout=30, allow_redirects=True)
+            upstream.close()
+        else:
+            upstream = session.get(video_url, headers=headers, stream=True, timeout=30, allow_redirects=True)
+
+        if upstream.status_code == 416:
+            upstream.close()
+            resp_headers = {"Content-Range": upstream.headers.get("Content-Range", "bytes */*")}
+            return Response(status=416, headers=resp_headers)
+        if upstream.status_code not in (200, 206):
+            upstream.close()
             return jsonify({"success": False, "error": f"上游返回 {upstream.status_code}"}), 502
 
         content_type = upstream.headers.get("Content-Type", "video/mp4")
@@ -572,47 +1327,99 @@ def api_download():
         resp_headers = {
             "Content-Type": content_type,
             "Content-Disposition": f'attachment; filename="{encoded_title}.mp4"; filename*=UTF-8\'\'{encoded_title}.mp4',
+            "Accept-Ranges": "bytes",
         }
         if content_length:
             resp_headers["Content-Length"] = content_length
+        for name in _RANGE_RESPONSE_HEADERS:
+            if upstream.headers.get(name):
+                resp_headers[name] = upstream.headers[name]
 
-        return Response(upstream.iter_content(chunk_size=65536), headers=resp_headers)
+        if request.method == "HEAD":
+            return Response(status=upstream.status_code, headers=resp_headers)
+        return Response(_iter_upstream(upstream), status=upstream.status_code, headers=resp_headers)
     except requests.RequestException as e:
         return jsonify({"success": False, "error": str(e)}), 502
 
 
-@app.route("/api/save_feishu", methods=["POST"])
-def api_save_feishu():
-    """保存转写文字到飞书文档（含 AI 纠错+摘要）"""
-    client = get_feishu_client()
-    if not client:
-        return jsonify({"success": False, "error": "飞书功能未配置"})
+@app.route("/api/audio", methods=["GET", "HEAD"])
+def api_audio():
+    """视频的音轨（m4a），供火山引擎转写时回源下载
 
-    data = request.get_json(silent=True) or {}
-    text = data.get("text", "").strip()
-    if not text:
-        return jsonify({"success": False, "error": "没有可保存的文字内容"})
+    已抽取的音轨直接返回；未命中时在后台开始抽取（不在请求中等待 ffmpeg），
+    本次请求以及 ffmpeg 不可用时重定向到 /api/download 返回完整视频。
+    转写任务会在提交前提前抽取，火山引擎回源时通常直接命中缓存。
+    """
+    video_url = request.args.get("url", "").strip()
+    if not video_url:
+        return jsonify({"success": False, "error": "缺少 url 参数"}), 400
+    from transcriber import is_douyin_media_url
+
+    if not is_douyin_media_url(video_url):
+        return jsonify({"success": False, "error": "只支持抖音视频地址"}), 400
+
+    extractor = get_audio_extractor()
+    if extractor is not None:
+        from transcriber import media_fingerprint
+
+        path = extractor.cache.lookup(media_fingerprint(video_url))
+        if path:
+            return send_file(path, mimetype="audio/mp4", conditional=True)
+        # 同一视频重复提交时由 AudioExtractor 合并为一次抽取
+        _audio_executor.submit(_extract_audio, video_url)
+    return redirect(f"/api/download?url={quote(video_url, safe='')}")
+
+
+def _prepare_content(data: dict, text: str):
+    """AI 纠错 + 摘要，并在标题缺失时自动生成
 
-    # AI 处理：纠错 + 摘要
+    请求中带 ai_processed=true 时（如已经过 /api/pipeline 处理），直接使用请求中的
+    文字和 summary，不再重复调用大模型。
+
+    Returns:
+        (final_text, summary, title)
+    """
     final_text = text
-    summary = ""
+    summary = data.get("summary", "").strip()
     title = data.get("title", "").strip()
     ai = get_ai_processor()
     if ai:
-        ai_result = ai.process(text)
-        if ai_result.success:
-            final_text = ai_result.corrected_text
-            summary = ai_result.summary
-        else:
-            logging.warning(f"AI 处理失败，使用原始文字: {ai_result.error}")
         # 标题为空或"未知"时，AI 自动生成
-        if (not title or title == "未知") and ai:
+        need_title = not title or title == "未知"
+        if not data.get("ai_processed"):
+            # 标题与纠错、摘要同时生成
+            ai_result = ai.process(text, with_title=need_title)
+            if ai_result.success:
+                final_text = ai_result.corrected_text
+                summary = ai_result.summary
+            else:
+                logging.warning(f"AI 处理失败，使用原始文字: {ai_result.error}")
+            if ai_result.title:
+                title = ai_result.title
+                need_title = False
+        if need_title:
             generated = ai.generate_title(final_text)
             if generated:
                 title = generated
 
     if not title:
         title = "未知视频"
+    return final_text, summary, title
+
+
+@app.route("/api/save_feishu", methods=["POST"])
+def api_save_feishu():
+    """保存转写文字到飞书文档（含 AI 纠错+摘要）"""
+    client = get_feishu_client()
+    if not client:
+        return jsonify({"success": False, "error": "飞书功能未配置"})
+
+    data = request.get_json(silent=True) or {}
+    text = data.get("text", "").strip()
+    if not text:
+        return jsonify({"success": False, "error": "没有可保存的文字内容"})
+
+    final_text, summary, title = _prepare_content(data, text)
 
     result = client.save_transcript(
         title=title,
@@ -631,7 +1438,11 @@ def api_save_feishu():
 
 @app.route("/api/send_email", methods=["POST"])
 def api_send_email():
-    """AI 润色后发送邮件"""
+    """AI 润色后发送邮件
+
+    邮件放入后台发件队列，立即返回 job_id，通过 /api/jobs/<job_id> 查询发送结果；
+    发送失败会自动重试。
+    """
     sender = get_email_sender()
     if not sender:
         return jsonify({"success": False, "error": "邮件功能未配置"})
@@ -644,41 +1455,32 @@ def api_send_email():
     if not to_addr:
         return jsonify({"success": False, "error": "请提供收件人邮箱"})
 
-    # AI 处理：纠错 + 摘要
-    final_text = text
-    summary = ""
-    title = data.get("title", "").strip()
-    ai = get_ai_processor()
-    if ai:
-        ai_result = ai.process(text)
-        if ai_result.success:
-            final_text = ai_result.corrected_text
-            summary = ai_result.summary
-        else:
-            logging.warning(f"AI 处理失败，使用原始文字: {ai_result.error}")
-        # 标题为空或"未知"时，AI 自动生成
-        if (not title or title == "未知") and ai:
-            generated = ai.generate_title(final_text)
-            if generated:
-                title = generated
+    job = get_email_outbox().submit("send_email", {
+        "to": to_addr,
+        "text": text,
+        "data": {k: v for k, v in data.items() if k not in ("text", "to")},
+    })
+    return jsonify({"success": True, "job_id": job.id, "status": job.status})
 
-    if not title:
-        title = "未知视频"
 
-    result = sender.send_transcript(
-        to_addr=to_addr,
-        title=title,
-        author=data.get("author", ""),
-        source_url=data.get("source_url", ""),
-        duration=data.get("duration", 0),
-        text=final_text,
-        summary=summary,
-    )
+# 后台任务队列的工作线程按进程启动：导入时启动一次（gunicorn 每个 worker 进程各自导入），
+# 进程 fork 后线程不会继承，由 before_request 在该进程的第一个请求时补上。
+# 这样进程重启前未完成的转写、邮件等任务不必等到下一次提交同类任务才被执行。
+_queues_started_pid = None
 
-    if result.success:
-        return jsonify({"success": True})
-    else:
-        return jsonify({"success": False, "error": result.error})
+
+@app.before_request
+def _start_background_queues():
+    global _queues_started_pid
+    if _queues_started_pid == os.getpid():
+        return
+    _queues_started_pid = os.getpid()
+    get_job_queue()
+    get_pipeline_queue()
+    get_email_outbox()
+
+
+_start_background_queues()
 
 
 if __name__ == "__main__":